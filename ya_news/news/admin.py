@@ -1,15 +1,138 @@
+import tempfile
+
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.html import format_html
 
+from . import deletion, export, services
 from .models import Comment, News
 
+User = get_user_model()
+
+
+class ChunkedDeleteMixin:
+    """
+    Удаление через news.deletion вместо сборщика Django.
+
+    Страница подтверждения показывает удаляемые записи и число
+    комментариев, не загружая сами комментарии.
+    """
+    delete_function = None
+    comments_lookup = None
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, self.model.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        self.delete_function(queryset)
 
-class CommentInline(admin.StackedInline):
-    model = Comment
-    extra = 0
+    def get_deleted_objects(self, objs, request):
+        pks = [obj.pk for obj in objs]
+        comments = Comment.objects.filter(
+            **{f'{self.comments_lookup}__in': pks}
+        ).count()
+        opts = self.model._meta
+        model_count = {opts.verbose_name_plural: len(pks)}
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(opts.verbose_name)
+        if comments:
+            model_count[Comment._meta.verbose_name_plural] = comments
+            if not request.user.has_perm('news.delete_comment'):
+                perms_needed.add(Comment._meta.verbose_name)
+        return [str(obj) for obj in objs], model_count, perms_needed, []
 
 
 @admin.register(News)
-class NewsAdmin(admin.ModelAdmin):
-    inlines = [
-        CommentInline,
-    ]
+class NewsAdmin(ChunkedDeleteMixin, admin.ModelAdmin):
+    """
+    Новости без встроенных комментариев.
+
+    Число комментариев берётся из денормализованного comment_count,
+    а сами комментарии открываются ссылкой в постраничном списке
+    CommentAdmin: страница новости не зависит от размера обсуждения.
+    """
+    list_display = ('title', 'date', 'comments', 'views')
+    search_fields = ('title',)
+    readonly_fields = (
+        'comments', 'last_commented_at', 'unique_commenters', 'views'
+    )
+    show_full_result_count = False
+    actions = ('export_csv', 'export_xlsx')
+    delete_function = staticmethod(deletion.delete_news)
+    comments_lookup = 'news'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('commenters_sketch')
+
+    @admin.action(description='Выгрузить с комментариями в CSV')
+    def export_csv(self, request, queryset):
+        response = StreamingHttpResponse(
+            export.csv_lines(export.export_rows(queryset)),
+            content_type='text/csv; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'attachment; filename="news.csv"'
+        return response
+
+    @admin.action(description='Выгрузить с комментариями в XLSX')
+    def export_xlsx(self, request, queryset):
+        # Безымянный временный файл удалится, когда ответ его закроет.
+        file = tempfile.TemporaryFile()
+        export.write_xlsx(export.export_rows(queryset), file)
+        file.seek(0)
+        return FileResponse(file, as_attachment=True, filename='news.xlsx')
+
+    @admin.display(description='Комментарии', ordering='comment_count')
+    def comments(self, obj):
+        url = reverse('admin:news_comment_changelist')
+        return format_html(
+            '<a href="{}?news__id__exact={}">{}</a>',
+            url, obj.pk, obj.comment_count
+        )
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """
+    Постраничный список комментариев.
+
+    Добавление, изменение и удаление идут через news.services
+    и news.deletion, чтобы счётчики новостей оставались верными.
+    """
+    list_display = ('__str__', 'news', 'author', 'created')
+    list_select_related = ('news', 'author')
+    autocomplete_fields = ('news', 'author')
+    ordering = ('-pk',)
+    list_per_page = 50
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(
+            'news__text', 'news__excerpt', 'news__commenters_sketch'
+        )
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            services.update_comment(
+                obj, form.initial.get('news', obj.news_id)
+            )
+        else:
+            services.add_comment(obj.news, obj.author, obj)
+
+    def delete_model(self, request, obj):
+        services.delete_comment(obj)
+
+    def delete_queryset(self, request, queryset):
+        deletion.delete_comments(queryset)
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class ChunkedDeleteUserAdmin(ChunkedDeleteMixin, UserAdmin):
+    delete_function = staticmethod(deletion.delete_users)
+    comments_lookup = 'author'
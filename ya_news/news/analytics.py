@@ -0,0 +1,182 @@
+"""
+Аналитика вовлечённости по комментариям.
+
+Комментарии читаются порциями по CHUNK_SIZE строк через pandas.read_sql
+и обрабатываются векторно, без цикла по строкам. Между порциями
+хранятся только агрегаты: число комментариев по дням, матрица
+«новость × день после публикации» и уникальные пары «комментатор ×
+месяц». Память зависит от числа новостей, дней и активных комментаторов,
+но не от числа комментариев.
+
+Время комментариев переводится в TIME_ZONE. Даты выбираются как текст
+ISO 8601: иначе драйвер SQLite разбирает каждую дату в Python.
+"""
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import TextField
+from django.db.models.functions import Cast
+
+from .models import Comment, News
+
+CHUNK_SIZE = 200000
+# Месяцы в ключе пары «комментатор × месяц»: key = author * MONTHS + month.
+MONTHS = 4096
+
+
+def _read_sql(queryset, chunk_size=None):
+    """Выборка как DataFrame или, если задан chunk_size, их итератор."""
+    sql, params = queryset.query.sql_with_params()
+    connection.ensure_connection()
+    return pd.read_sql_query(
+        sql, connection.connection, params=params, chunksize=chunk_size
+    )
+
+
+def _local_days(column):
+    """Строки времени UTC -> дни с 1970-01-01 по местному времени."""
+    moments = pd.to_datetime(column, format='ISO8601')
+    if moments.dt.tz is None:
+        moments = moments.dt.tz_localize('UTC')
+    local = moments.dt.tz_convert(settings.TIME_ZONE).dt.tz_localize(None)
+    return local.to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _months(days):
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(
+        np.int64
+    )
+
+
+class EngagementReport:
+    """
+    Собирает аналитику за один проход по комментариям.
+
+    horizon — сколько дней после публикации новости учитывать в кривой
+    вовлечённости; более поздние комментарии попадают в последний день.
+    """
+
+    def __init__(self, horizon=30, chunk_size=CHUNK_SIZE):
+        self.horizon = horizon
+        self.chunk_size = chunk_size
+        news = _read_sql(
+            News.objects.order_by('pk').values_list(
+                'pk', Cast('date', TextField())
+            )
+        )
+        self.news_ids = news.iloc[:, 0].to_numpy(np.int64)
+        self.news_days = pd.to_datetime(news.iloc[:, 1]).to_numpy().astype(
+            'datetime64[D]'
+        ).astype(np.int64)
+        self.users = get_user_model().objects.count()
+        self.comments = 0
+        self.per_day = pd.Series(dtype=np.int64)
+        self.by_age = np.zeros(
+            len(self.news_ids) * (horizon + 1), dtype=np.int64
+        )
+        self.activity = np.empty(0, dtype=np.int64)
+
+    def collect(self):
+        comments = Comment.objects.order_by().values_list(
+            'news_id', 'author_id', Cast('created', TextField())
+        )
+        for chunk in _read_sql(comments, self.chunk_size):
+            self._add(
+                chunk.iloc[:, 0].to_numpy(np.int64),
+                chunk.iloc[:, 1].to_numpy(np.int64),
+                _local_days(chunk.iloc[:, 2]),
+            )
+        return self
+
+    def _add(self, news, authors, days):
+        # Новости, созданные после снимка в __init__, в отчёт не входят.
+        index = np.searchsorted(self.news_ids, news)
+        known = index < len(self.news_ids)
+        known[known] = self.news_ids[index[known]] == news[known]
+        if not known.all():
+            index, authors, days = index[known], authors[known], days[known]
+        self.comments += len(days)
+        unique_days, counts = np.unique(days, return_counts=True)
+        self.per_day = self.per_day.add(
+            pd.Series(counts, index=unique_days), fill_value=0
+        )
+        age = np.clip(days - self.news_days[index], 0, self.horizon)
+        self.by_age += np.bincount(
+            index * (self.horizon + 1) + age, minlength=len(self.by_age)
+        )
+        self.activity = np.union1d(
+            self.activity, authors * MONTHS + _months(days)
+        )
+
+    def comments_per_day(self):
+        """Число комментариев по дням, включая дни без комментариев."""
+        if self.per_day.empty:
+            return pd.Series(dtype=np.int64, name='comments')
+        series = self.per_day.astype(np.int64)
+        series.index = series.index.to_numpy().astype('datetime64[D]')
+        days = pd.date_range(series.index.min(), series.index.max())
+        return series.reindex(days, fill_value=0).rename('comments')
+
+    def engagement(self):
+        """
+        Доля комментариев новости, набранная к каждому дню после
+        публикации: квартили по новостям, у которых есть комментарии.
+        """
+        counts = self.by_age.reshape(len(self.news_ids), self.horizon + 1)
+        totals = counts.sum(axis=1)
+        discussed = totals > 0
+        shares = counts[discussed].cumsum(axis=1) / totals[discussed, None]
+        if not discussed.any():
+            shares = np.zeros((1, self.horizon + 1))
+        return pd.DataFrame(
+            np.percentile(shares, (25, 50, 75), axis=0).T,
+            columns=('p25', 'p50', 'p75'),
+        ).rename_axis('day')
+
+    def retention(self):
+        """
+        Удержание комментаторов по когортам месяца первого комментария:
+        доля когорты, комментировавшая через n месяцев.
+        """
+        if not len(self.activity):
+            return pd.DataFrame()
+        authors, months = np.divmod(self.activity, MONTHS)
+        # Пары отсортированы по ключу, поэтому первая пара автора — его
+        # первый месяц.
+        _, first, per_author = np.unique(
+            authors, return_index=True, return_counts=True
+        )
+        cohorts = np.repeat(months[first], per_author)
+        offsets = months - cohorts
+        start = cohorts.min()
+        width = offsets.max() + 1
+        table = np.bincount(
+            (cohorts - start) * width + offsets,
+            minlength=(cohorts.max() - start + 1) * width,
+        ).reshape(-1, width)
+        sizes = table[:, 0]
+        active = sizes > 0
+        index = pd.PeriodIndex(
+            (np.arange(len(table)) + start).astype('datetime64[M]')[active],
+            freq='M',
+        )
+        return pd.DataFrame(
+            table[active] / sizes[active, None], index=index
+        ).rename_axis('cohort').rename_axis('month', axis=1).assign(
+            size=sizes[active]
+        )
+
+    def summary(self):
+        """Общие показатели."""
+        commenters = len(np.unique(self.activity // MONTHS))
+        return {
+            'Новостей': len(self.news_ids),
+            'Комментариев': self.comments,
+            'Пользователей': self.users,
+            'Комментаторов': commenters,
+            'Доля комментирующих': (
+                round(commenters / self.users, 3) if self.users else 0
+            ),
+        }
@@ -0,0 +1,361 @@
+"""
+Проверка шаблонов на запросы N+1 (manage.py check).
+
+Для каждого представления приложения со списком или одним объектом
+модели обходится его шаблон (с подключаемыми через include). Внутри
+циклов по объектам ищутся обращения к связанным объектам:
+{{ object.author }} или {{ object.comment_set.count }}. Каждое такое
+обращение — отдельный запрос на каждую итерацию, если связь не
+загружена заранее. Заранее загруженные связи берутся из вызовов
+select_related, prefetch_related и prefetch_related_objects
+в get_queryset, get_object и get_context_data представления (разбором
+исходного кода) и из атрибута queryset.
+
+Проверка статическая: переменные, которые не выводятся из контекста
+представления, и связи в свойствах и методах моделей не учитываются.
+"""
+import ast
+import inspect
+import os
+import textwrap
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.core import checks
+from django.db.models import QuerySet
+from django.template import Template, TemplateDoesNotExist
+from django.template.base import VariableNode
+from django.template.defaulttags import (
+    ForNode, IfNode, TemplateLiteral, URLNode, WithNode
+)
+from django.template.loader import get_template
+from django.template.loader_tags import IncludeNode
+from django.views.generic.detail import SingleObjectMixin
+from django.views.generic.list import MultipleObjectMixin
+
+QUERYSET_METHODS = ('get_queryset', 'get_object', 'get_context_data')
+PRELOADING_METHODS = (
+    'select_related', 'prefetch_related', 'prefetch_related_objects'
+)
+
+
+class Entry:
+    """Переменная шаблона: объект или набор объектов модели."""
+
+    def __init__(self, model, path='', many=False, in_loop=False):
+        self.model = model
+        self.path = path
+        self.many = many
+        self.in_loop = in_loop
+
+
+def _relation(model, name):
+    """Связь модели с именем или именем обратного менеджера name."""
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.related_model is None:
+            continue
+        if field.auto_created and not field.concrete:
+            accessor = field.get_accessor_name()
+        else:
+            accessor = field.name
+        if accessor == name:
+            return field
+    return None
+
+
+def _resolve(scope, lookups):
+    """
+    Значение переменной шаблона и путь связи, загружаемой на каждой
+    итерации цикла (пустая строка, если такой нет).
+    """
+    entry = scope.get(lookups[0])
+    if entry is None:
+        return None, ''
+    model, path, many = entry.model, entry.path, entry.many
+    for name in lookups[1:]:
+        if many:
+            # all, count, exists и т. п. набора объектов.
+            break
+        field = _relation(model, name)
+        if field is None:
+            break
+        model = field.related_model
+        path = f'{path}__{name}' if path else name
+        many = field.one_to_many or field.many_to_many
+    if model is entry.model and path == entry.path:
+        return entry, ''
+    return (
+        Entry(model, path, many, entry.in_loop),
+        path if entry.in_loop else '',
+    )
+
+
+def _variables(expression):
+    """Переменные выражения шаблона вместе с аргументами фильтров."""
+    if getattr(expression.var, 'lookups', None):
+        yield expression.var.lookups
+    for _, arguments in expression.filters:
+        for is_variable, argument in arguments:
+            if is_variable and argument.lookups:
+                yield argument.lookups
+
+
+def _condition_expressions(condition):
+    """Выражения условия тега if."""
+    if condition is None:
+        return
+    if isinstance(condition, TemplateLiteral):
+        yield condition.value
+    for operand in (
+        getattr(condition, 'first', None), getattr(condition, 'second', None)
+    ):
+        yield from _condition_expressions(operand)
+
+
+def _expressions(node):
+    """Выражения, которые вычисляет сам узел (без вложенных узлов)."""
+    if isinstance(node, VariableNode):
+        yield node.filter_expression
+    elif isinstance(node, IfNode):
+        for condition, _ in node.conditions_nodelists:
+            yield from _condition_expressions(condition)
+    elif isinstance(node, URLNode):
+        yield from node.args
+        yield from node.kwargs.values()
+    elif isinstance(node, (IncludeNode, WithNode)):
+        yield from node.extra_context.values()
+
+
+def _bind(scope, context):
+    """Область видимости с переменными из with или include ... with."""
+    scope = dict(scope)
+    for name, expression in context.items():
+        lookups = getattr(expression.var, 'lookups', None)
+        entry = _resolve(scope, lookups)[0] if lookups else None
+        if entry is None:
+            scope.pop(name, None)
+        else:
+            scope[name] = entry
+    return scope
+
+
+def _location(node):
+    name = node.origin.name
+    if os.path.isabs(name):
+        name = os.path.relpath(name, settings.BASE_DIR)
+    return f'{name}:{node.token.lineno}'
+
+
+class TemplateWalker:
+    """Обходит шаблон и собирает обращения к связям внутри циклов."""
+
+    def __init__(self):
+        # {(место в шаблоне, путь связи)}
+        self.found = set()
+
+    def add(self, node, path):
+        if path:
+            self.found.add((_location(node), path))
+
+    def walk(self, nodelist, scope, included=()):
+        for node in nodelist:
+            for expression in _expressions(node):
+                for lookups in _variables(expression):
+                    self.add(node, _resolve(scope, lookups)[1])
+            if isinstance(node, ForNode):
+                self.walk_for(node, scope, included)
+            elif isinstance(node, IfNode):
+                self.walk(node.nodelist, scope, included)
+            elif isinstance(node, WithNode):
+                self.walk(
+                    node.nodelist, _bind(scope, node.extra_context), included
+                )
+            elif isinstance(node, IncludeNode):
+                self.walk_include(node, scope, included)
+            else:
+                for attr in node.child_nodelists:
+                    self.walk(getattr(node, attr, None) or (), scope, included)
+
+    def walk_for(self, node, scope, included):
+        entry = None
+        lookups = getattr(node.sequence.var, 'lookups', None)
+        if lookups:
+            entry, path = _resolve(scope, lookups)
+            self.add(node, path)
+        loop_scope = {
+            name: value for name, value in scope.items()
+            if name not in node.loopvars
+        }
+        if entry is not None and entry.many and len(node.loopvars) == 1:
+            loop_scope[node.loopvars[0]] = Entry(
+                entry.model, entry.path, in_loop=True
+            )
+        self.walk(node.nodelist_loop, loop_scope, included)
+        self.walk(node.nodelist_empty, scope, included)
+
+    def walk_include(self, node, scope, included):
+        name = node.template.var
+        if not isinstance(name, str) or name in included:
+            return
+        template = _template(name)
+        if template is not None:
+            outer = {} if node.isolated_context else scope
+            self.walk(
+                template.nodelist,
+                _bind(outer, node.extra_context),
+                included + (name,),
+            )
+
+
+def _template(name):
+    try:
+        template = get_template(name)
+    except TemplateDoesNotExist:
+        return None
+    return getattr(template, 'template', None)
+
+
+def _model(view):
+    if view.model is None and view.queryset is not None:
+        return view.queryset.model
+    return view.model
+
+
+def _context(view):
+    """Переменные контекста представления с объектами его модели."""
+    model = _model(view)
+    if model is None:
+        return {}
+    names = [view.context_object_name or None]
+    if issubclass(view, MultipleObjectMixin):
+        names += ['object_list', f'{model._meta.model_name}_list']
+        entry = Entry(model, many=True)
+    else:
+        names += ['object', model._meta.model_name]
+        entry = Entry(model)
+    return {name: entry for name in names if name}
+
+
+def _queryset_lookups(queryset):
+    """Связи из select_related и prefetch_related готового queryset."""
+    lookups = set()
+    related = queryset.query.select_related
+    stack = [('', related)] if isinstance(related, dict) else []
+    while stack:
+        prefix, tree = stack.pop()
+        for name, subtree in tree.items():
+            lookups.add(prefix + name)
+            stack.append((prefix + name + '__', subtree))
+    lookups.update(
+        getattr(lookup, 'prefetch_through', lookup)
+        for lookup in queryset._prefetch_related_lookups
+    )
+    return lookups
+
+
+def _source_lookups(function):
+    """Связи из вызовов PRELOADING_METHODS и Prefetch."""
+    try:
+        source = inspect.getsource(function)
+    except (OSError, TypeError):
+        return set()
+    lookups = set()
+    for call in ast.walk(ast.parse(textwrap.dedent(source))):
+        if not isinstance(call, ast.Call):
+            continue
+        called = getattr(call.func, 'attr', getattr(call.func, 'id', ''))
+        if called in PRELOADING_METHODS:
+            arguments = call.args
+        elif called == 'Prefetch':
+            arguments = call.args[:1]
+        else:
+            continue
+        lookups.update(
+            argument.value for argument in arguments
+            if isinstance(argument, ast.Constant)
+            and isinstance(argument.value, str)
+        )
+    return lookups
+
+
+def _preloaded(view):
+    """Связи, которые представление загружает заранее."""
+    lookups = set()
+    if isinstance(view.queryset, QuerySet):
+        lookups |= _queryset_lookups(view.queryset)
+    for name in QUERYSET_METHODS:
+        # Методы самого Django связей не загружают.
+        for klass in view.__mro__:
+            if (
+                name in vars(klass)
+                and not klass.__module__.startswith('django.')
+            ):
+                lookups |= _source_lookups(vars(klass)[name])
+                break
+    return lookups
+
+
+def _preload_method(model, path):
+    """select_related для цепочки прямых связей, иначе prefetch_related."""
+    for name in path.split('__'):
+        field = _relation(model, name)
+        if field.one_to_many or field.many_to_many:
+            return 'prefetch_related'
+        model = field.related_model
+    return 'select_related'
+
+
+def find_n_plus_one(view, template=None):
+    """
+    Вероятные N+1 в шаблоне представления view.
+
+    Возвращает отсортированный список (место в шаблоне, путь связи).
+    """
+    if template is None:
+        template = _template(view.template_name)
+    if not isinstance(template, Template):
+        return []
+    walker = TemplateWalker()
+    walker.walk(template.nodelist, _context(view))
+    preloaded = _preloaded(view)
+    return sorted(
+        (location, path) for location, path in walker.found
+        if not any(
+            lookup == path or lookup.startswith(path + '__')
+            for lookup in preloaded
+        )
+    )
+
+
+def _views(app_config):
+    """Представления приложения с объектами модели и шаблоном."""
+    try:
+        module = import_module(f'{app_config.name}.views')
+    except ImportError:
+        return []
+    return [
+        view for _, view in inspect.getmembers(module, inspect.isclass)
+        if view.__module__ == module.__name__
+        and issubclass(view, (MultipleObjectMixin, SingleObjectMixin))
+        and getattr(view, 'template_name', None)
+    ]
+
+
+@checks.register(checks.Tags.templates)
+def check_n_plus_one(app_configs=None, **kwargs):
+    app_config = apps.get_containing_app_config(__name__)
+    if app_configs is not None and app_config not in app_configs:
+        return []
+    warnings = []
+    for view in _views(app_config):
+        for location, path in find_n_plus_one(view):
+            method = _preload_method(_model(view), path)
+            warnings.append(checks.Warning(
+                f'{location}: связь {path} загружается отдельным запросом '
+                f'на каждой итерации цикла.',
+                hint=f"Добавьте {method}('{path}') в {view.__name__}.",
+                obj=view,
+                id=f'{app_config.label}.W001',
+            ))
+    return warnings
@@ -0,0 +1,112 @@
+"""
+Сжатие ответов и удаление лишних пробелов из HTML.
+
+CompressionMiddleware убирает из HTML пробельные строки, оставшиеся от
+шаблонов, и сжимает ответ gzip, в том числе потоковый. Маленькие ответы,
+уже сжатые и двоичные типы не сжимаются, как и text/event-stream: сжатие
+задержало бы события в буфере. Кеш страниц вызывает prepare() и хранит
+уже сжатое тело, поэтому повторно оно не сжимается.
+"""
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+COMPRESSIBLE_TYPES = (
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/xml',
+    'application/json', 'application/javascript', 'application/xml',
+    'image/svg+xml',
+)
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+# Внутри этих элементов пробелы значимы или относятся к коду.
+PRESERVED = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.DOTALL | re.IGNORECASE
+)
+# Пробелы с переводом строки между тегами и текстом. Заменяются одним
+# переводом строки: пробел между строчными элементами остаётся.
+BLANK_LINES = re.compile(r'\s*\n\s*')
+
+
+def minify_html(html):
+    """Схлопывает пробельные строки вне pre, textarea, script и style."""
+    parts = PRESERVED.split(html)
+    # split с двумя группами даёт: текст, элемент, имя тега, текст, ...
+    for index in range(0, len(parts), 3):
+        parts[index] = BLANK_LINES.sub('\n', parts[index])
+    del parts[2::3]
+    return ''.join(parts).strip()
+
+
+def _content_type(response):
+    return response.get('Content-Type', '').split(';')[0].strip()
+
+
+def minify(response):
+    """Удаляет лишние пробелы из готового HTML-ответа."""
+    if (
+        response.streaming
+        or response.has_header('Content-Encoding')
+        or _content_type(response) != 'text/html'
+    ):
+        return
+    response.content = minify_html(
+        response.content.decode(response.charset)
+    ).encode(response.charset)
+    if response.has_header('Content-Length'):
+        response['Content-Length'] = str(len(response.content))
+
+
+def compressible(response):
+    """Стоит ли сжимать ответ."""
+    if (
+        response.has_header('Content-Encoding')
+        or _content_type(response) not in COMPRESSIBLE_TYPES
+    ):
+        return False
+    return (
+        response.streaming
+        or len(response.content) >= settings.COMPRESSION_MIN_SIZE
+    )
+
+
+def accepts_gzip(request):
+    return bool(
+        ACCEPTS_GZIP.search(request.headers.get('Accept-Encoding', ''))
+    )
+
+
+def prepare(request, response):
+    """
+    Готовит ответ для кеша страниц: удаляет пробелы и, если клиент
+    принимает gzip, сжимает тело.
+    """
+    if hasattr(response, 'render'):
+        response.render()
+    minify(response)
+    if response.streaming or not compressible(response):
+        return
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if not accepts_gzip(request):
+        return
+    compressed = compress_string(response.content)
+    if len(compressed) < len(response.content):
+        response.content = compressed
+        response['Content-Encoding'] = 'gzip'
+        response['Content-Length'] = str(len(compressed))
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware с удалением пробелов из HTML и выбором типов."""
+
+    def process_response(self, request, response):
+        etag = response.get('ETag', '')
+        if response.get('Content-Encoding') == 'gzip' and etag[:1] == '"':
+            # Тело из кеша страниц уже сжато, а ETag к нему добавлен
+            # позже: строгий ETag не должен совпадать у разных кодировок.
+            response['ETag'] = 'W/' + etag
+        minify(response)
+        if not compressible(response):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,75 @@
+"""
+Валидаторы для условных GET-запросов.
+
+Валидатор считается несколькими лёгкими запросами до основной выборки
+и отрисовки шаблона: если клиент прислал актуальный If-None-Match, он
+сразу получает ответ 304.
+
+Last-Modified не отдаётся: время последнего изменения из оставшихся
+строк уходит назад при удалении новости или комментария, и клиент
+получил бы 304 на изменившуюся страницу. ETag учитывает число строк.
+"""
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import Comment, News
+
+
+def _state_per_request(func):
+    """Считаем состояние страницы один раз за запрос."""
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        attr = f'_{func.__name__}'
+        if not hasattr(request, attr):
+            setattr(request, attr, func(request, *args, **kwargs))
+        return getattr(request, attr)
+    return wrapper
+
+
+def _viewer(request):
+    """Общие страницы не зависят от пользователя, остальные — зависят."""
+    if settings.NEWS_CACHEABLE_PAGES:
+        return None
+    return request.user.pk
+
+
+def _make_etag(news_rows, comments, request):
+    version = repr((news_rows, comments, _viewer(request)))
+    return md5(version.encode(), usedforsecurity=False).hexdigest()
+
+
+def _comments_state(queryset):
+    return queryset.aggregate(count=Count('id'), updated=Max('updated'))
+
+
+@_state_per_request
+def _news_list_state(request, *args, **kwargs):
+    news_rows = list(
+        News.objects.values_list(
+            'pk', 'updated'
+        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+    )
+    comments = _comments_state(
+        Comment.objects.filter(news__in=[pk for pk, _ in news_rows])
+    )
+    return _make_etag(news_rows, comments, request)
+
+
+@_state_per_request
+def _news_detail_state(request, pk, *args, **kwargs):
+    news_rows = list(News.objects.filter(pk=pk).values_list('pk', 'updated'))
+    if not news_rows:
+        return None
+    comments = _comments_state(Comment.objects.filter(news_id=pk))
+    return _make_etag(news_rows, comments, request)
+
+
+def news_list_etag(request, *args, **kwargs):
+    return _news_list_state(request, *args, **kwargs)
+
+
+def news_detail_etag(request, *args, **kwargs):
+    return _news_detail_state(request, *args, **kwargs)
@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def cacheable_pages(request):
+    """Сообщает шаблонам, включён ли режим общих для всех страниц."""
+    return {'cacheable_pages': settings.NEWS_CACHEABLE_PAGES}
@@ -0,0 +1,116 @@
+"""
+Буферизованные счётчики просмотров новостей.
+
+Просмотры копятся в памяти процесса, а фоновый поток сбрасывает их в БД
+одной короткой транзакцией раз в NEWS_VIEWS_FLUSH_INTERVAL секунд.
+Чтение новостей в БД не пишет и не встаёт в очередь за блокировкой
+записи SQLite. Если запись не удалась, просмотры возвращаются в буфер
+до следующего сброса. При обычной остановке процесса остаток
+сбрасывается через atexit; при падении теряются просмотры не более чем
+за один интервал. NEWS_VIEWS_FLUSH_INTERVAL = 0 сбрасывает просмотры
+сразу, без фонового потока (для тестов).
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F
+
+from .models import News
+
+logger = logging.getLogger(__name__)
+
+# Ограничение на число параметров в одном запросе SQLite.
+FLUSH_BATCH_SIZE = 500
+
+
+class ViewCounter:
+    """Счётчик просмотров одного процесса."""
+
+    def __init__(self):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        # Процесс, в котором работает фоновый поток: после fork
+        # поток нужно запустить заново.
+        self._timer_pid = None
+        self._atexit_registered = False
+
+    def incr(self, news_id):
+        with self._lock:
+            self._pending[news_id] += 1
+        if settings.NEWS_VIEWS_FLUSH_INTERVAL <= 0:
+            self.flush()
+        else:
+            self._ensure_timer()
+
+    def _ensure_timer(self):
+        pid = os.getpid()
+        with self._lock:
+            if self._timer_pid == pid:
+                return
+            self._timer_pid = pid
+            if not self._atexit_registered:
+                atexit.register(self.flush)
+                self._atexit_registered = True
+        threading.Thread(
+            target=self._run, name='view-counter', daemon=True
+        ).start()
+
+    def _run(self):
+        while True:
+            # Решение о выходе и сброс _timer_pid — под одной блокировкой,
+            # иначе incr может не запустить поток, считая его живым.
+            with self._lock:
+                interval = settings.NEWS_VIEWS_FLUSH_INTERVAL
+                if interval <= 0:
+                    self._timer_pid = None
+                    return
+            time.sleep(interval)
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """
+        Записывает накопленные просмотры в БД.
+
+        При ошибке БД просмотры возвращаются в буфер; возвращает False.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return True
+        # Новости с одинаковым приростом обновляются одним запросом.
+        by_delta = defaultdict(list)
+        for news_id, delta in pending.items():
+            by_delta[delta].append(news_id)
+        try:
+            with transaction.atomic():
+                for delta, news_ids in by_delta.items():
+                    for start in range(0, len(news_ids), FLUSH_BATCH_SIZE):
+                        News.objects.filter(
+                            pk__in=news_ids[start:start + FLUSH_BATCH_SIZE]
+                        ).update(views=F('views') + delta)
+        except DatabaseError:
+            logger.warning(
+                'Просмотры %d новостей не записаны, повтор при следующем '
+                'сбросе', len(pending), exc_info=True
+            )
+            with self._lock:
+                self._pending.update(pending)
+            return False
+        return True
+
+    def reset(self):
+        """Отбрасывает накопленные просмотры."""
+        with self._lock:
+            self._pending.clear()
+
+
+view_counter = ViewCounter()
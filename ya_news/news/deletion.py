@@ -0,0 +1,132 @@
+"""
+Удаление больших объёмов данных порциями.
+
+Обычное удаление собирает в Python все зависимые строки и удаляет их
+одной долгой транзакцией, на всё это время блокируя запись в SQLite.
+Здесь комментарии удаляются обычным delete() по chunk_size строк,
+каждая порция — отдельная короткая транзакция. Сигналы отправляются,
+но обработчики news, пока идёт удаление порциями (in_bulk_deletion()),
+не трогают рейтинг и страницы ради каждого комментария: счётчики
+затронутых новостей пересчитываются, а рейтинг обсуждаемых и заранее
+отрисованные страницы пересобираются один раз после удаления.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+
+from . import prerender, trending
+from .models import Comment, News
+from .services import reconcile_comment_counters
+
+CHUNK_SIZE = 500
+
+_bulk_deletion = ContextVar('bulk_deletion', default=False)
+
+
+def in_bulk_deletion():
+    """Идёт ли в текущем контексте удаление порциями."""
+    return _bulk_deletion.get()
+
+
+@contextmanager
+def _bulk():
+    token = _bulk_deletion.set(True)
+    try:
+        yield
+    finally:
+        _bulk_deletion.reset(token)
+
+
+def _delete_chunked(queryset, chunk_size, pause, fields=()):
+    """
+    Удаляет строки выборки порциями.
+
+    Возвращает число удалённых строк и множество значений полей fields
+    у удалённых строк.
+    """
+    queryset = queryset.order_by('pk')
+    deleted = 0
+    seen = set()
+    while True:
+        rows = list(queryset.values_list('pk', *fields)[:chunk_size])
+        if not rows:
+            return deleted, seen
+        with _bulk(), transaction.atomic():
+            deleted += queryset.model._base_manager.filter(
+                pk__in=[row[0] for row in rows]
+            ).delete()[1].get(queryset.model._meta.label, 0)
+        for row in rows:
+            seen.update(row[1:])
+        if pause:
+            time.sleep(pause)
+
+
+def _delete_parents(queryset, chunk_size, pause):
+    """
+    Удаляет строки выборки обычным delete() порциями по первичному ключу.
+
+    Для записей, чьи тяжёлые зависимости уже удалены: сборщику остаётся
+    проверить связи и отправить сигналы.
+    """
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    deleted = 0
+    for start in range(0, len(pks), chunk_size):
+        deleted += queryset.model.objects.filter(
+            pk__in=pks[start:start + chunk_size]
+        ).delete()[1].get(queryset.model._meta.label, 0)
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def _reconcile(news_ids, chunk_size):
+    news_ids = sorted(news_ids)
+    for start in range(0, len(news_ids), chunk_size):
+        reconcile_comment_counters(
+            News.objects.filter(
+                pk__in=news_ids[start:start + chunk_size]
+            )
+        )
+
+
+def delete_comments(queryset, chunk_size=CHUNK_SIZE, pause=0):
+    """Удаляет комментарии выборки и возвращает их число."""
+    deleted, news_ids = _delete_chunked(
+        queryset, chunk_size, pause, fields=('news_id',)
+    )
+    _reconcile(news_ids, chunk_size)
+    if deleted:
+        trending.rebuild()
+        prerender.news_changed(sorted(news_ids))
+    return deleted
+
+
+def delete_news(queryset, chunk_size=CHUNK_SIZE, pause=0):
+    """
+    Удаляет новости вместе с комментариями.
+
+    Возвращает число удалённых новостей и комментариев.
+    """
+    comments, _ = _delete_chunked(
+        Comment.objects.filter(news__in=queryset.values('pk')),
+        chunk_size, pause
+    )
+    news = _delete_parents(queryset, chunk_size, pause)
+    if comments:
+        trending.rebuild()
+    return news, comments
+
+
+def delete_users(queryset, chunk_size=CHUNK_SIZE, pause=0):
+    """
+    Удаляет пользователей вместе с их комментариями.
+
+    Возвращает число удалённых пользователей и комментариев.
+    """
+    comments = delete_comments(
+        Comment.objects.filter(author__in=queryset.values('pk')),
+        chunk_size, pause
+    )
+    return _delete_parents(queryset, chunk_size, pause), comments
@@ -0,0 +1,141 @@
+"""
+Рассылка новых комментариев подписчикам потока SSE.
+
+Сигнал post_save публикует событие, а брокер раздаёт его очередям
+asyncio подключённых клиентов: на клиента приходится одна очередь
+и одна сопрограмма, а не поток. Если задан NEWS_EVENTS_SOCKET_DIR,
+события рассылаются датаграммами всем процессам, которые слушают
+свой UNIX-сокет в этом каталоге.
+"""
+import asyncio
+import atexit
+import json
+import os
+import socket
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+# Больше датаграммы _receive не прочитает.
+MAX_DATAGRAM = 65536
+
+
+def comment_event(comment):
+    """Данные события о новом комментарии."""
+    return {
+        'id': comment.pk,
+        'news': comment.news_id,
+        'author': comment.author.get_username(),
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def format_event(event):
+    """Событие в формате text/event-stream."""
+    data = json.dumps(event, ensure_ascii=False)
+    return f'id: {event["id"]}\nevent: comment\ndata: {data}\n\n'
+
+
+def _datagram(event):
+    """Событие в датаграмме; длинный текст укорачивается до MAX_DATAGRAM."""
+    data = json.dumps(event).encode()
+    if len(data) > MAX_DATAGRAM:
+        # Каждый удалённый символ сокращает JSON хотя бы на байт.
+        excess = len(data) - MAX_DATAGRAM
+        event = {**event, 'text': event['text'][:-excess]}
+        data = json.dumps(event).encode()
+    return data
+
+
+def _put(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # Медленный клиент пропускает событие, но не тормозит остальных:
+        # после переподключения он дочитает пропущенное по Last-Event-ID.
+        pass
+
+
+class Broker:
+    """Брокер событий одного процесса."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._socket = None
+
+    def subscribe(self, news_id):
+        """Подписывает текущий цикл событий на комментарии новости."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=settings.NEWS_EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[news_id].add((loop, queue))
+            if settings.NEWS_EVENTS_SOCKET_DIR and self._socket is None:
+                self._listen(loop)
+        return queue
+
+    def unsubscribe(self, news_id, queue):
+        with self._lock:
+            subscribers = self._subscribers[news_id]
+            subscribers.difference_update(
+                [item for item in subscribers if item[1] is queue]
+            )
+            if not subscribers:
+                del self._subscribers[news_id]
+
+    def subscribers_count(self):
+        with self._lock:
+            return sum(map(len, self._subscribers.values()))
+
+    def dispatch(self, event):
+        """Раздаёт событие подписчикам этого процесса из любого потока."""
+        with self._lock:
+            targets = list(self._subscribers.get(event['news'], ()))
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(_put, queue, event)
+
+    def publish(self, event):
+        """Публикует событие для всех процессов."""
+        if not settings.NEWS_EVENTS_SOCKET_DIR:
+            self.dispatch(event)
+            return
+        data = _datagram(event)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            # Публикация идёт в on_commit запроса: процесс, который
+            # не читает свой сокет, не должен её задерживать.
+            sender.setblocking(False)
+            for path in Path(settings.NEWS_EVENTS_SOCKET_DIR).glob('*.sock'):
+                try:
+                    sender.sendto(data, str(path))
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Сокет остался от завершившегося процесса.
+                    path.unlink(missing_ok=True)
+                except BlockingIOError:
+                    # Очередь получателя заполнена: событие он пропустит
+                    # и дочитает его по Last-Event-ID.
+                    pass
+
+    def _listen(self, loop):
+        directory = Path(settings.NEWS_EVENTS_SOCKET_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'{os.getpid()}.sock'
+        path.unlink(missing_ok=True)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(str(path))
+        self._socket.setblocking(False)
+        loop.add_reader(self._socket.fileno(), self._receive)
+        atexit.register(path.unlink, missing_ok=True)
+
+    def _receive(self):
+        while True:
+            try:
+                data = self._socket.recv(MAX_DATAGRAM)
+            except BlockingIOError:
+                return
+            self.dispatch(json.loads(data))
+
+
+broker = Broker()
@@ -0,0 +1,104 @@
+"""
+Выгрузка новостей с комментариями в CSV и XLSX.
+
+Строки читаются итераторами по двум упорядоченным по новости выборкам
+и сразу записываются, поэтому память не зависит от числа комментариев.
+Заголовки, имена и тексты пишут пользователи: значения, которые Excel
+принял бы за формулу, экранируются апострофом.
+CSV отдаётся клиенту по мере формирования. XLSX — архив, который нельзя
+отдавать частями, пока он пишется: openpyxl в режиме write-only пишет
+его во временный файл, и файл отдаётся целиком после записи.
+"""
+import csv
+
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from .models import Comment
+
+HEADER = (
+    'ID новости', 'Заголовок', 'Дата',
+    'ID комментария', 'Автор', 'Создан', 'Текст',
+)
+CHUNK_SIZE = 2000
+# С этих символов Excel и другие табличные редакторы начинают формулу.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Предел строк на листе Excel; дальше строки идут на следующий лист.
+XLSX_MAX_ROWS = 1048576
+
+
+def export_rows(news_queryset):
+    """
+    Строки выгрузки: новость и её комментарий, по строке на комментарий.
+
+    Новость без комментариев даёт одну строку с пустыми полями
+    комментария.
+    """
+    news_rows = news_queryset.order_by('pk').values_list(
+        'pk', 'title', 'date'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    comments = Comment.objects.filter(
+        news__in=news_queryset.values('pk')
+    ).order_by('news_id', 'pk').values_list(
+        'news_id', 'pk', 'author__username', 'created', 'text'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    comment = next(comments, None)
+    for news in news_rows:
+        exported = False
+        while comment is not None and comment[0] == news[0]:
+            yield (*news, *comment[1:])
+            exported = True
+            comment = next(comments, None)
+        if not exported:
+            yield (*news, None, None, None, None)
+
+
+def escape_formula(value):
+    """Строка, которую редактор таблиц покажет как текст, а не формулу."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """Строки CSV для StreamingHttpResponse."""
+    writer = csv.writer(Echo())
+    # BOM: без него Excel открывает UTF-8 как однобайтовую кодировку.
+    yield '\ufeff' + writer.writerow(HEADER)
+    for row in rows:
+        yield writer.writerow(map(escape_formula, row))
+
+
+def write_xlsx(rows, file):
+    """Записывает строки в XLSX в режиме write-only openpyxl."""
+    workbook = Workbook(write_only=True)
+    sheet = None
+    written = XLSX_MAX_ROWS
+    for news_id, title, date, comment_id, author, created, text in rows:
+        if written == XLSX_MAX_ROWS:
+            sheet = workbook.create_sheet()
+            sheet.append(HEADER)
+            written = 1
+        if created is not None:
+            # Excel не хранит часовые пояса.
+            created = timezone.localtime(created).replace(tzinfo=None)
+        # Управляющие символы в ячейках XLSX недопустимы.
+        title = escape_formula(ILLEGAL_CHARACTERS_RE.sub('', title))
+        author = escape_formula(author)
+        if text is not None:
+            text = escape_formula(ILLEGAL_CHARACTERS_RE.sub('', text))
+        sheet.append(
+            (news_id, title, date, comment_id, author, created, text)
+        )
+        written += 1
+    if sheet is None:
+        workbook.create_sheet().append(HEADER)
+    workbook.save(file)
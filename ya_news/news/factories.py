@@ -0,0 +1,95 @@
+"""
+Быстрое создание данных для тестов и бенчмарков.
+
+Объекты каждого вида вставляются одним bulk_create. Время и даты
+задаются явно, поэтому порядок объектов не зависит от скорости вставки.
+Пароль хешируется один раз на всех пользователей; в тестовом профиле
+yanews.settings_test хешер быстрый (MD5).
+
+bulk_create не вызывает save() и сигналы: анонс новости заполняется здесь,
+а денормализованные счётчики комментариев не меняются, как и при
+Comment.objects.create().
+"""
+from datetime import timedelta
+from functools import lru_cache
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from .models import Comment, News, make_excerpt
+
+User = get_user_model()
+
+PASSWORD = 'password123'
+
+
+@lru_cache
+def _password_hash(password):
+    return make_password(password)
+
+
+def make_users(*usernames, password=PASSWORD):
+    """Пользователи с общим паролем; None — вход по паролю невозможен."""
+    return User.objects.bulk_create(
+        User(username=username, password=_password_hash(password))
+        for username in usernames
+    )
+
+
+def make_user(username, password=PASSWORD):
+    return make_users(username, password=password)[0]
+
+
+def make_news(
+    count=1, title='Новость {i}', text='Текст новости {i}', start=None
+):
+    """
+    Новости по одной на день: первая датирована start (по умолчанию
+    сегодня), каждая следующая — на день раньше. В title и text
+    подставляется номер i.
+    """
+    start = start or timezone.localdate()
+    news = []
+    for i in range(count):
+        body = text.format(i=i)
+        news.append(News(
+            title=title.format(i=i),
+            text=body,
+            excerpt=make_excerpt(body),
+            date=start - timedelta(days=i),
+        ))
+    return News.objects.bulk_create(news)
+
+
+def make_comments(
+    news,
+    authors,
+    count=1,
+    text='Комментарий {i}',
+    start=None,
+    step=timedelta(minutes=1),
+):
+    """
+    Комментарии к новости по очереди от authors (пользователь или
+    список). Первый создан в start, каждый следующий — на step позже;
+    по умолчанию последний создан сейчас.
+    """
+    if isinstance(authors, User):
+        authors = [authors]
+    start = start or timezone.now() - step * (count - 1)
+    created = [start + step * i for i in range(count)]
+    comments = Comment.objects.bulk_create(
+        Comment(
+            news=news,
+            author=authors[i % len(authors)],
+            text=text.format(i=i),
+        )
+        for i in range(count)
+    )
+    # auto_now_add перезаписывает created при вставке, поэтому время
+    # задаётся вторым запросом.
+    for comment, moment in zip(comments, created):
+        comment.created = moment
+    Comment.objects.bulk_update(comments, ['created'])
+    return comments
@@ -0,0 +1,57 @@
+"""
+HyperLogLog: приближённый подсчёт числа различных значений.
+
+Скетч — 2 ** PRECISION однобайтовых регистров (1 КБ). Стандартная
+ошибка оценки — RELATIVE_ERROR, около 3,25%. Скетчи объединяются
+поэлементным максимумом регистров, поэтому оценку за период можно
+получить, объединив скетчи отдельных новостей.
+"""
+import math
+from hashlib import blake2b
+
+PRECISION = 10
+REGISTERS = 1 << PRECISION
+RELATIVE_ERROR = 1.04 / math.sqrt(REGISTERS)
+
+_HASH_BITS = 64
+_REST_BITS = _HASH_BITS - PRECISION
+_ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+
+
+class HyperLogLog:
+
+    def __init__(self, data=b''):
+        data = bytes(data or b'')
+        if len(data) != REGISTERS:
+            data = bytes(REGISTERS)
+        self.registers = bytearray(data)
+
+    def add(self, value):
+        """Добавляет значение. Возвращает True, если скетч изменился."""
+        digest = blake2b(str(value).encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        index = hashed >> _REST_BITS
+        rest = hashed & ((1 << _REST_BITS) - 1)
+        rank = _REST_BITS - rest.bit_length() + 1
+        if rank <= self.registers[index]:
+            return False
+        self.registers[index] = rank
+        return True
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        """Оценка числа различных добавленных значений."""
+        estimate = _ALPHA * REGISTERS * REGISTERS / sum(
+            2.0 ** -rank for rank in self.registers
+        )
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * REGISTERS and zeros:
+            # Поправка для малых значений: линейный подсчёт.
+            estimate = REGISTERS * math.log(REGISTERS / zeros)
+        return round(estimate)
+
+    def to_bytes(self):
+        return bytes(self.registers)
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from news.models import News, make_excerpt
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет анонсы новостей. Работает порциями по диапазонам '
+        'первичного ключа, каждая порция — отдельная короткая транзакция.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help='Пауза между порциями в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        bounds = News.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            return
+        chunk_size = options['chunk_size']
+        updated = 0
+        for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+            with transaction.atomic():
+                changed = []
+                for news in News.objects.filter(
+                    pk__gte=start, pk__lt=start + chunk_size
+                ).only('pk', 'text', 'excerpt'):
+                    excerpt = make_excerpt(news.text)
+                    if news.excerpt != excerpt:
+                        news.excerpt = excerpt
+                        changed.append(news)
+                News.objects.bulk_update(changed, ('excerpt',))
+            updated += len(changed)
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(f'Обновлено анонсов: {updated}')
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.factories import make_user
+
+# Запросы к БД, которые делает аутентификация до представления.
+AUTH_TABLES = {
+    'сессия': 'FROM "django_session"',
+    'пользователь': 'FROM "auth_user"',
+}
+BASELINE = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+    'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает запросы к БД на сессию и пользователя для запросов '
+        'вошедшего пользователя: с сессиями в БД и с кешем.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100)
+
+    def handle(self, *args, **options):
+        # Тестовые данные создаются в транзакции и откатываются в конце.
+        with transaction.atomic():
+            user = make_user('bench_auth_queries', password=None)
+            with override_settings(**BASELINE):
+                self.report('БД', user, options['requests'])
+            self.report('кеш', user, options['requests'])
+            transaction.set_rollback(True)
+
+    def report(self, title, user, count):
+        cache.clear()
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        client.force_login(user)
+        url = reverse('news:home')
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(count):
+                client.get(url)
+        counts = {
+            name: sum(
+                marker in query['sql'] for query in context.captured_queries
+            ) / count
+            for name, marker in AUTH_TABLES.items()
+        }
+        self.stdout.write(
+            f'{title}: '
+            + ', '.join(
+                f'{name} {value:.2f}' for name, value in counts.items()
+            )
+            + f', всего {len(context.captured_queries) / count:.2f} '
+            'запроса на страницу'
+        )
@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from news.factories import make_comments, make_news, make_user
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает полные и условные GET-запросы к страницам новостей: '
+        'объём ответа и процессорное время на запрос.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--comments', type=int, default=200)
+
+    def handle(self, *args, **options):
+        # Тестовые данные создаются в транзакции и откатываются в конце.
+        with transaction.atomic():
+            news = self.seed(options['comments'])
+            client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+            urls = (
+                reverse('news:home'),
+                reverse('news:detail', args=[news.pk]),
+            )
+            for url in urls:
+                self.report(client, url, options['requests'])
+            transaction.set_rollback(True)
+
+    def seed(self, comments_count):
+        author = make_user('bench_conditional_get', password=None)
+        news = make_news(text='Текст ' * 200)[0]
+        make_comments(news, author, comments_count)
+        return news
+
+    def measure(self, client, url, count, **headers):
+        sent = 0
+        started = time.process_time()
+        for _ in range(count):
+            sent += len(client.get(url, **headers).content)
+        return (time.process_time() - started) / count, sent / count
+
+    def report(self, client, url, count):
+        etag = client.get(url)['ETag']
+        full_cpu, full_size = self.measure(client, url, count)
+        cond_cpu, cond_size = self.measure(
+            client, url, count, HTTP_IF_NONE_MATCH=etag
+        )
+        self.stdout.write(
+            f'{url}\n'
+            f'  200: {full_cpu * 1000:.2f} мс CPU, {full_size:.0f} байт\n'
+            f'  304: {cond_cpu * 1000:.2f} мс CPU, {cond_size:.0f} байт\n'
+            f'  экономия: {(1 - cond_cpu / full_cpu) * 100:.0f}% CPU, '
+            f'{full_size - cond_size:.0f} байт на запрос'
+        )
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from news.factories import make_comments, make_news, make_user
+from news.views import NewsDetail
+
+
+class Command(BaseCommand):
+    help = (
+        'Имитирует лавину одновременных запросов к странице популярной '
+        'новости с пустым кешем: без кеша страниц и с single-flight. '
+        'Показывает, сколько раз страница считалась заново, и задержки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--comments', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        author = make_user('bench_page_stampede', password=None)
+        news = make_news()[0]
+        make_comments(news, author, options['comments'])
+        url = reverse('news:detail', args=[news.pk])
+        try:
+            for label, timeout in (('без кеша', 0), ('single-flight', 60)):
+                with override_settings(
+                    NEWS_CACHEABLE_PAGES=True, PAGE_CACHE_TIMEOUT=timeout
+                ):
+                    cache.clear()
+                    renders, latencies = self.stampede(
+                        url, options['clients']
+                    )
+                latencies.sort()
+                p50 = latencies[len(latencies) // 2]
+                p99 = latencies[int(len(latencies) * 0.99) - 1]
+                self.stdout.write(
+                    f'{label}: пересчётов страницы {renders} '
+                    f'на {len(latencies)} запросов, '
+                    f'p50 {p50 * 1000:.0f} мс, p99 {p99 * 1000:.0f} мс'
+                )
+        finally:
+            news.delete()
+            author.delete()
+
+    def stampede(self, url, clients):
+        renders = 0
+        latencies = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(clients)
+        get_object = NewsDetail.get_object
+
+        def counted_get_object(view, queryset=None):
+            nonlocal renders
+            with lock:
+                renders += 1
+            return get_object(view, queryset)
+
+        def request():
+            client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+            barrier.wait()
+            started = time.perf_counter()
+            client.get(url)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+            connection.close()
+
+        NewsDetail.get_object = counted_get_object
+        try:
+            threads = [
+                threading.Thread(target=request) for _ in range(clients)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            NewsDetail.get_object = get_object
+        return renders, latencies
@@ -0,0 +1,123 @@
+import asyncio
+import resource
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import reverse
+
+from news.events import broker
+from news.factories import make_news, make_user
+from news.models import Comment
+
+
+class Connection:
+    """Клиент SSE, подключённый к ASGI-приложению без сетевого сервера."""
+
+    def __init__(self, path):
+        self.path = path
+        self.request_sent = False
+        self.closed = asyncio.Event()
+        self.received = asyncio.Event()
+
+    @property
+    def scope(self):
+        return {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': self.path,
+            'raw_path': self.path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'localhost')],
+            'client': ('127.0.0.1', 50000),
+            'server': ('127.0.0.1', 8000),
+        }
+
+    async def receive(self):
+        if not self.request_sent:
+            self.request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.closed.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if (
+            message['type'] == 'http.response.body'
+            and b'event: comment' in message.get('body', b'')
+        ):
+            self.received.set()
+
+
+class Command(BaseCommand):
+    help = (
+        'Открывает много простаивающих подключений к потоку комментариев '
+        'через yanews.asgi и измеряет память, число потоков и время '
+        'доставки одного комментария всем подписчикам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=2000)
+        parser.add_argument('--timeout', type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        with override_settings(NEWS_EVENTS_ENABLED=True):
+            asyncio.run(self.run(options['connections'], options['timeout']))
+
+    def seed(self):
+        author = make_user('bench_sse_connections', password=None)
+        news = make_news()[0]
+        return author, news
+
+    async def run(self, count, timeout):
+        from yanews.asgi import application
+
+        author, news = await sync_to_async(self.seed)()
+        path = reverse('news:comment_stream', args=[news.pk])
+        clients = [Connection(path) for _ in range(count)]
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        tasks = [
+            asyncio.create_task(
+                application(client.scope, client.receive, client.send)
+            )
+            for client in clients
+        ]
+        try:
+            async with asyncio.timeout(timeout):
+                while broker.subscribers_count() < count:
+                    await asyncio.sleep(0.01)
+            connected = time.perf_counter() - started
+            rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            threads = threading.active_count()
+
+            published = time.perf_counter()
+            await sync_to_async(Comment.objects.create)(
+                news=news, author=author, text='Комментарий'
+            )
+            async with asyncio.timeout(timeout):
+                await asyncio.gather(
+                    *(client.received.wait() for client in clients)
+                )
+            delivered = time.perf_counter() - published
+        except TimeoutError:
+            raise CommandError('Подписчики не дождались события.')
+        finally:
+            for client in clients:
+                client.closed.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await sync_to_async(author.delete)()
+            await sync_to_async(news.delete)()
+
+        self.stdout.write(
+            f'Подключений: {count}, установлены за {connected:.2f} с\n'
+            f'Потоков в процессе: {threads}\n'
+            f'Память: +{(rss_after - rss_before) / count:.1f} КБ '
+            f'на подключение\n'
+            f'Доставка комментария всем: {delivered * 1000:.1f} мс'
+        )
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from news.factories import make_news, make_users
+from news.models import Comment
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Одновременно отправляет комментарии от множества пользователей: '
+        'с прямой записью и через очередь записи. Показывает пропускную '
+        'способность, задержки и число ошибок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=50)
+        parser.add_argument('--comments', type=int, default=20)
+
+    def handle(self, *args, **options):
+        news = make_news()[0]
+        users = make_users(
+            *(f'bench_write_queue_{i}' for i in range(options['writers'])),
+            password=None,
+        )
+        url = reverse('news:detail', args=[news.pk])
+        try:
+            modes = (('прямая запись', False), ('очередь', True))
+            for label, enabled in modes:
+                with override_settings(
+                    WRITE_QUEUE_ENABLED=enabled, RATE_LIMITS={}
+                ):
+                    elapsed, latencies, errors = self.run(
+                        url, users, options['comments']
+                    )
+                latencies.sort()
+                p50 = latencies[len(latencies) // 2]
+                p99 = latencies[int(len(latencies) * 0.99) - 1]
+                written = len(latencies) - errors
+                self.stdout.write(
+                    f'{label}: {written / elapsed:.0f} записей/с, '
+                    f'p50 {p50 * 1000:.0f} мс, p99 {p99 * 1000:.0f} мс, '
+                    f'ошибок {errors} из {len(latencies)}'
+                )
+                Comment.objects.filter(news=news).delete()
+        finally:
+            news.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def run(self, url, users, comments):
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(users) + 1)
+
+        clients = []
+        for user in users:
+            client = Client(
+                HTTP_HOST=settings.ALLOWED_HOSTS[0],
+                raise_request_exception=False,
+            )
+            client.force_login(user)
+            clients.append(client)
+
+        def write(client):
+            nonlocal errors
+            barrier.wait()
+            for i in range(comments):
+                started = time.perf_counter()
+                response = client.post(url, {'text': f'Комментарий {i}'})
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    errors += response.status_code != 302
+            connection.close()
+
+        threads = [
+            threading.Thread(target=write, args=(client,))
+            for client in clients
+        ]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, latencies, errors
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from news.hll import RELATIVE_ERROR
+from news.models import News
+from news.services import unique_commenters
+
+
+class Command(BaseCommand):
+    help = (
+        'Оценивает число разных комментаторов у новостей за период, '
+        'объединяя скетчи HyperLogLog отдельных новостей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Дата новости от, ГГГГ-ММ-ДД.')
+        parser.add_argument('--until', help='Дата новости до, ГГГГ-ММ-ДД.')
+
+    def handle(self, *args, **options):
+        news = News.objects.all()
+        if options['since']:
+            news = news.filter(date__gte=options['since'])
+        if options['until']:
+            news = news.filter(date__lte=options['until'])
+        self.stdout.write(
+            f'Разных комментаторов: ≈{unique_commenters(news)} '
+            f'(погрешность около {RELATIVE_ERROR:.1%})'
+        )
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.export import csv_lines, export_rows, write_xlsx
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает новости с комментариями в CSV или XLSX (по расширению '
+        'файла). Память не зависит от числа комментариев.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', type=Path)
+        parser.add_argument(
+            '--news', type=int, nargs='+',
+            help='ID новостей; по умолчанию выгружаются все.'
+        )
+
+    def handle(self, *args, **options):
+        news = News.objects.all()
+        if options['news']:
+            news = news.filter(pk__in=options['news'])
+        output = options['output']
+        suffix = output.suffix.lower()
+        if suffix == '.csv':
+            with output.open('w', encoding='utf-8', newline='') as file:
+                file.writelines(csv_lines(export_rows(news)))
+        elif suffix == '.xlsx':
+            write_xlsx(export_rows(news), output)
+        else:
+            raise CommandError('Поддерживаются файлы .csv и .xlsx')
+        self.stdout.write(f'Выгрузка записана в {output}')
@@ -0,0 +1,85 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.utils.html import escape
+from matplotlib.figure import Figure
+
+from news.analytics import CHUNK_SIZE, EngagementReport
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит отчёт о вовлечённости: комментарии по дням, кривые '
+        'вовлечённости новостей, когорты и удержание комментаторов. '
+        'Пишет в каталог таблицы CSV, графики PNG и report.html.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', type=Path)
+        parser.add_argument('--horizon', type=int, default=30)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        report = EngagementReport(
+            options['horizon'], options['chunk_size']
+        ).collect()
+        output = options['output']
+        output.mkdir(parents=True, exist_ok=True)
+
+        per_day = report.comments_per_day()
+        engagement = report.engagement()
+        retention = report.retention()
+        per_day.to_csv(output / 'comments_per_day.csv')
+        engagement.to_csv(output / 'engagement.csv')
+        retention.to_csv(output / 'retention.csv')
+
+        figure = Figure(figsize=(10, 4))
+        axes = figure.subplots()
+        axes.plot(per_day.index, per_day.to_numpy())
+        axes.set_title('Комментарии по дням')
+        figure.savefig(output / 'comments_per_day.png')
+
+        figure = Figure(figsize=(6, 4))
+        axes = figure.subplots()
+        engagement.plot(
+            ax=axes, ylim=(0, 1),
+            title='Доля комментариев к дню после публикации',
+        )
+        figure.savefig(output / 'engagement.png')
+
+        figure = Figure(figsize=(8, 6))
+        axes = figure.subplots()
+        rates = retention.drop(columns='size', errors='ignore')
+        axes.imshow(rates.to_numpy(), aspect='auto', vmin=0, vmax=1)
+        axes.set(
+            title='Удержание комментаторов', xlabel='Месяцев спустя',
+            ylabel='Когорта',
+        )
+        axes.set_yticks(range(len(rates)), [str(p) for p in rates.index])
+        figure.savefig(output / 'retention.png')
+
+        summary = ''.join(
+            f'<tr><th>{escape(name)}</th><td>{value}</td></tr>'
+            for name, value in report.summary().items()
+        )
+        (output / 'report.html').write_text(
+            '<!DOCTYPE html><html lang="ru"><meta charset="utf-8">'
+            '<title>Вовлечённость</title>'
+            f'<table>{summary}</table>'
+            '<h2>Комментарии по дням</h2>'
+            '<img src="comments_per_day.png" alt="">'
+            '<h2>Вовлечённость новостей</h2>'
+            '<img src="engagement.png" alt="">'
+            f'{engagement.to_html(float_format="{:.2f}".format)}'
+            '<h2>Удержание комментаторов</h2>'
+            '<img src="retention.png" alt="">'
+            f'{retention.to_html(float_format="{:.2f}".format)}'
+            '</html>',
+            encoding='utf-8',
+        )
+        self.stdout.write(
+            f'Отчёт записан в {output} '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
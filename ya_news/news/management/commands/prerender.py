@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news import prerender
+
+
+class Command(BaseCommand):
+    help = (
+        'Отрисовывает главную и страницы всех новостей в анонимном '
+        'варианте в каталог PRERENDER_ROOT и удаляет страницы удалённых '
+        'новостей.'
+    )
+
+    def handle(self, *args, **options):
+        if not prerender.enabled():
+            raise CommandError('Не задан PRERENDER_ROOT')
+        started = time.perf_counter()
+        count = prerender.rebuild()
+        self.stdout.write(
+            f'Страниц новостей: {count}, каталог {settings.PRERENDER_ROOT}, '
+            f'{time.perf_counter() - started:.1f} с'
+        )
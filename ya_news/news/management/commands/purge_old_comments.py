@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from news.deletion import CHUNK_SIZE, delete_comments
+from news.models import Comment
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет комментарии старше заданного числа дней. Удаляет '
+        'порциями, каждая — отдельной короткой транзакцией, затем '
+        'пересчитывает счётчики затронутых новостей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('days', type=int)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help='Пауза между порциями в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        deleted = delete_comments(
+            Comment.objects.filter(
+                created__lt=timezone.now() - timedelta(days=options['days'])
+            ),
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+        )
+        self.stdout.write(f'Удалено комментариев: {deleted}')
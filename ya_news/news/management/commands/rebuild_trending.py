@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from news import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает рейтинг обсуждаемых новостей по БД. '
+        'Запускайте периодически, например раз в несколько минут.'
+    )
+
+    def handle(self, *args, **options):
+        count = trending.rebuild()
+        self.stdout.write(f'Новостей в рейтинге: {count}')
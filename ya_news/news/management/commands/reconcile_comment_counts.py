@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from news.models import News
+from news.services import reconcile_comment_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает число комментариев и время последнего комментария '
+        'у новостей. Работает порциями по диапазонам первичного ключа, '
+        'чтобы не держать блокировку записи надолго.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help='Пауза между порциями в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        bounds = News.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            return
+        chunk_size = options['chunk_size']
+        fixed = 0
+        for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+            fixed += reconcile_comment_counters(
+                News.objects.filter(pk__gte=start, pk__lt=start + chunk_size)
+            )
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(f'Исправлено новостей: {fixed}')
@@ -0,0 +1,40 @@
+import base64
+import hashlib
+from pathlib import Path
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+BOOTSTRAP_URL = 'https://cdn.jsdelivr.net/npm/bootstrap@5.0.1/dist/css/'
+# Хеш Subresource Integrity, с которым шаблоны подключали файл с CDN.
+BOOTSTRAP_SRI = (
+    'sha384-+0n0xVW2eSR5OomGNYDnhzAbDsOXxcvSN1TPprVMTNDbiYZCxYbOOl7+AMvyTG2x'
+)
+FILES = ('bootstrap.min.css', 'bootstrap.min.css.map')
+
+
+def _sri(data):
+    digest = hashlib.sha384(data).digest()
+    return 'sha384-' + base64.b64encode(digest).decode()
+
+
+class Command(BaseCommand):
+    help = (
+        'Скачивает Bootstrap 5.0.1 в static_dev/css, проверяя хеш '
+        'bootstrap.min.css. Карта исходников нужна collectstatic: '
+        'файл ссылается на неё.'
+    )
+
+    def handle(self, *args, **options):
+        target = Path(settings.STATICFILES_DIRS[0]) / 'css'
+        downloaded = {}
+        for name in FILES:
+            with urlopen(BOOTSTRAP_URL + name, timeout=30) as response:
+                downloaded[name] = response.read()
+        if _sri(downloaded[FILES[0]]) != BOOTSTRAP_SRI:
+            raise CommandError(f'Хеш {FILES[0]} не совпадает с ожидаемым.')
+        target.mkdir(parents=True, exist_ok=True)
+        for name, data in downloaded.items():
+            (target / name).write_bytes(data)
+        self.stdout.write(f'Bootstrap записан в {target}')
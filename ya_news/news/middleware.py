@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.http import FileResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date
+
+from . import compression, prerender
+from .counters import view_counter
+
+PRERENDERED_VIEWS = ('news:home', 'news:detail')
+
+
+class PrerenderedPageMiddleware:
+    """
+    Отдаёт анонимным читателям заранее отрисованные страницы.
+
+    Запрос без cookie сессии и без параметров к главной или к странице
+    новости получает файл из PRERENDER_ROOT, если он есть; шаблоны и БД
+    не используются. Просмотр новости засчитывается, как и в NewsDetail.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            prerender.enabled()
+            and request.method in ('GET', 'HEAD')
+            and not request.GET
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        ):
+            response = self.prerendered(request)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def prerendered(self, request):
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if match.view_name not in PRERENDERED_VIEWS:
+            return None
+        path = prerender.page_path(request.path_info)
+        try:
+            modified = int(path.stat().st_mtime)
+            response = get_conditional_response(
+                request, last_modified=modified
+            )
+            if response is None:
+                response = self.file_response(request, path)
+        except FileNotFoundError:
+            return None
+        if match.view_name == 'news:detail' and request.method == 'GET':
+            view_counter.incr(match.kwargs['pk'])
+        response['Last-Modified'] = http_date(modified)
+        patch_cache_control(
+            response, public=True, max_age=settings.NEWS_PAGE_MAX_AGE
+        )
+        # Вошедшие пользователи получают страницу от Django.
+        patch_vary_headers(response, ('Cookie', 'Accept-Encoding'))
+        return response
+
+    def file_response(self, request, path):
+        """Файл страницы или его сжатая копия, если клиент принимает gzip."""
+        if compression.accepts_gzip(request):
+            try:
+                response = FileResponse(
+                    prerender.gzip_path(path).open('rb'),
+                    content_type='text/html; charset=utf-8',
+                )
+            except FileNotFoundError:
+                pass
+            else:
+                response['Content-Encoding'] = 'gzip'
+                return response
+        return FileResponse(
+            path.open('rb'), content_type='text/html; charset=utf-8'
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-19 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='last_commented_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_news_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='views',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
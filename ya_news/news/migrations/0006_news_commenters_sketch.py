@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-19 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_views'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='commenters_sketch',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='unique_commenters',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -2,12 +2,36 @@ from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 15
+
+
+def make_excerpt(text):
+    """Анонс новости: как фильтр truncatewords в шаблоне главной."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
+    excerpt = models.TextField(blank=True, editable=False)
     date = models.DateField(default=datetime.today)
+    updated = models.DateTimeField(auto_now=True)
+    # Денормализованные данные о комментариях, см. news.services.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_commented_at = models.DateTimeField(
+        null=True, blank=True, editable=False
+    )
+    # Оценка числа разных комментаторов и её скетч, см. news.hll.
+    unique_commenters = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+    commenters_sketch = models.BinaryField(default=b'', editable=False)
+    # Просмотры сбрасываются в БД порциями, см. news.counters.
+    views = models.PositiveIntegerField(
+        default=0, db_index=True, editable=False
+    )
 
     class Meta:
         ordering = ('-date',)
@@ -17,6 +41,13 @@ class News(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.excerpt = make_excerpt(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -29,6 +60,7 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ('created',)
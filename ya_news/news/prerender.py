@@ -0,0 +1,141 @@
+"""
+Заранее отрисованные страницы для анонимных читателей.
+
+Главная и страницы новостей в анонимном варианте записываются файлами
+в PRERENDER_ROOT по адресам страниц: /news/5/ -> news/5/index.html.
+Их отдаёт фронтовой сервер или PrerenderedPageMiddleware, если у
+запроса нет cookie сессии. Команда prerender пересобирает все страницы,
+а сигналы из news.signals — только затронутые изменением новости или
+комментария. Пока PRERENDER_ROOT равен None, страницы не пишутся.
+Рядом со страницей кладётся сжатая копия index.html.gz.
+"""
+import gzip
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from .compression import minify_html
+from .models import News
+from .views import NewsDetail, NewsList
+
+INDEX = 'index.html'
+GZIP_SUFFIX = '.gz'
+
+
+def enabled():
+    return settings.PRERENDER_ROOT is not None
+
+
+def page_path(url):
+    """Файл страницы с адресом url."""
+    return Path(settings.PRERENDER_ROOT, url.strip('/'), INDEX)
+
+
+def gzip_path(path):
+    """Сжатая копия файла страницы."""
+    return path.with_name(path.name + GZIP_SUFFIX)
+
+
+def _anonymous_request(url):
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = url
+    request.META['SERVER_NAME'] = settings.ALLOWED_HOSTS[0]
+    request.META['SERVER_PORT'] = '80'
+    request.user = AnonymousUser()
+    return request
+
+
+def _render(view_class, url, **kwargs):
+    """
+    Отрисовывает страницу представлением без его обёрток.
+
+    Декораторы кеша и условного GET и счётчик просмотров в dispatch
+    не вызываются: нужен только HTML для анонимного читателя.
+    """
+    request = _anonymous_request(url)
+    view = view_class()
+    view.setup(request, **kwargs)
+    if hasattr(view, 'get_object'):
+        view.object = view.get_object()
+        context = view.get_context_data(object=view.object)
+    else:
+        view.object_list = view.get_queryset()
+        context = view.get_context_data()
+    return render_to_string(view.template_name, context, request)
+
+
+def _write_file(path, data):
+    """Записывает файл атомарно: читатель не увидит его наполовину."""
+    fd, temporary = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as file:
+        file.write(data)
+    os.chmod(temporary, 0o644)
+    os.replace(temporary, path)
+
+
+def _write(path, content):
+    """Записывает страницу без лишних пробелов и её сжатую копию."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = minify_html(content).encode()
+    # Last-Modified берётся у страницы, поэтому сжатая копия пишется
+    # первой: клиент не получит старую копию с датой новой страницы.
+    _write_file(gzip_path(path), gzip.compress(data, mtime=0))
+    _write_file(path, data)
+
+
+def render_home():
+    url = reverse('news:home')
+    _write(page_path(url), _render(NewsList, url))
+
+
+def render_detail(pk):
+    url = reverse('news:detail', args=[pk])
+    _write(page_path(url), _render(NewsDetail, url, pk=pk))
+
+
+def remove_detail(pk):
+    shutil.rmtree(
+        page_path(reverse('news:detail', args=[pk])).parent,
+        ignore_errors=True,
+    )
+
+
+def news_changed(news_ids):
+    """Пересобирает страницы новостей и главную."""
+    if not enabled():
+        return
+    existing = set(
+        News.objects.filter(pk__in=news_ids).values_list('pk', flat=True)
+    )
+    for pk in news_ids:
+        if pk in existing:
+            render_detail(pk)
+        else:
+            remove_detail(pk)
+    render_home()
+
+
+def rebuild():
+    """
+    Пересобирает все страницы и удаляет страницы удалённых новостей.
+
+    Возвращает число страниц новостей.
+    """
+    existing = set()
+    for pk in News.objects.values_list('pk', flat=True).iterator():
+        render_detail(pk)
+        existing.add(str(pk))
+    render_home()
+    details = page_path(reverse('news:detail', args=[0])).parent.parent
+    for directory in details.iterdir() if details.is_dir() else ():
+        if directory.name not in existing:
+            shutil.rmtree(directory, ignore_errors=True)
+    return len(existing)
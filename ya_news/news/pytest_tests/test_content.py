@@ -1,6 +1,18 @@
+import gzip
+from io import StringIO
+
 import pytest
 from django.conf import settings
+from django.core.management import call_command
+from django.db import transaction
+from django.template import Template
 from django.urls import reverse
+from django.views import generic
+
+from news import services
+from news.checks import check_n_plus_one, find_n_plus_one
+from news.models import Comment, News
+from yanews.static import static_response
 
 
 pytestmark = pytest.mark.django_db
@@ -117,3 +129,238 @@ class TestContent:
             assert isinstance(response.context['form'], CommentForm)
         else:
             assert 'form' not in response.context
+
+    def test_cacheable_pages_same_for_everyone(
+        self,
+        settings,
+        news_with_comments,
+        anonymous_client,
+        author_client
+    ):
+        """В режиме кешируемых страниц HTML не зависит от пользователя."""
+        settings.NEWS_CACHEABLE_PAGES = True
+        urls = (
+            reverse('news:home'),
+            reverse('news:detail', args=[news_with_comments.pk]),
+        )
+        for url in urls:
+            anonymous_response = anonymous_client.get(url)
+            author_response = author_client.get(url)
+            assert anonymous_response.content == author_response.content
+            assert 'public' in anonymous_response['Cache-Control']
+            assert 'Cookie' not in anonymous_response.get('Vary', '')
+
+    def test_comment_form_fragment(
+        self,
+        news,
+        anonymous_client,
+        author_client
+    ):
+        """Фрагмент с формой получает только авторизованный пользователь."""
+        url = reverse('news:comment_form', args=[news.pk])
+        assert anonymous_client.get(url).content == b''
+
+        response = author_client.get(url)
+        from news.forms import CommentForm
+        assert isinstance(response.context['form'], CommentForm)
+        assert 'private' in response['Cache-Control']
+
+    def test_conditional_get_not_modified(
+        self,
+        comment,
+        author_client
+    ):
+        """Повторный запрос с актуальным ETag получает ответ 304."""
+        url = reverse('news:detail', args=[comment.news.pk])
+        etag = author_client.get(url)['ETag']
+        response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        comment.text = 'Изменённый комментарий'
+        comment.save()
+        response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        # Удаление самого свежего комментария тоже меняет версию страницы.
+        assert not response.has_header('Last-Modified')
+        etag = response['ETag']
+        comment.delete()
+        response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+
+    def test_detail_page_minified_and_compressed(
+        self,
+        news,
+        author,
+        author_client
+    ):
+        """HTML сжимается без пустых строк, переносы в тексте остаются."""
+        Comment.objects.create(
+            news=news, author=author, text='Первая строка\nВторая строка'
+        )
+        url = reverse('news:detail', args=[news.pk])
+        response = author_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        html = gzip.decompress(response.content).decode()
+        assert 'Первая строка<br>Вторая строка' in html
+        assert '\n\n' not in html
+        assert not any(line.isspace() for line in html.split('\n'))
+        plain = author_client.get(url)
+        assert not plain.has_header('Content-Encoding')
+        assert 'Первая строка<br>Вторая строка' in plain.content.decode()
+
+    def test_home_page_uses_excerpt(
+        self,
+        anonymous_client
+    ):
+        """Главная выводит анонс и не загружает полный текст новости."""
+        from news.models import News
+        news = News.objects.create(title='Длинная', text='слово ' * 100)
+        response = anonymous_client.get(reverse('news:home'))
+        news_obj = response.context['object_list'][0]
+        assert 'text' in news_obj.get_deferred_fields()
+        assert news_obj.excerpt == news.excerpt
+        assert news.excerpt in response.content.decode()
+
+    def test_admin_news_page_links_to_paginated_comments(
+        self,
+        admin_client,
+        comment
+    ):
+        """Страница новости в админке ссылается на список комментариев."""
+        news = comment.news
+        response = admin_client.get(
+            reverse('admin:news_news_change', args=[news.pk])
+        )
+        assert response.status_code == 200
+        assert 'comment_set-TOTAL_FORMS' not in response.content.decode()
+        comments_url = (
+            reverse('admin:news_comment_changelist')
+            + f'?news__id__exact={news.pk}'
+        )
+        assert comments_url in response.content.decode()
+        response = admin_client.get(comments_url)
+        assert list(response.context['cl'].result_list) == [comment]
+
+    def test_admin_exports_news_with_comments_to_csv(
+        self,
+        admin_client,
+        comment,
+        other_comment
+    ):
+        """Выгрузка в CSV отдаётся потоком, по строке на комментарий."""
+        response = admin_client.post(
+            reverse('admin:news_news_changelist'),
+            {'action': 'export_csv', '_selected_action': [comment.news.pk]}
+        )
+        assert response.streaming
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert len(lines) == 3
+        assert comment.text in lines[1]
+        assert other_comment.text in lines[2]
+
+    def test_prerendered_pages_served_to_anonymous(
+        self,
+        settings,
+        tmp_path,
+        news,
+        author,
+        anonymous_client,
+        author_client,
+        django_capture_on_commit_callbacks
+    ):
+        """Анонимный читатель получает заранее отрисованную страницу."""
+        settings.PRERENDER_ROOT = tmp_path
+        call_command('prerender', stdout=StringIO())
+        url = reverse('news:detail', args=[news.pk])
+        page = tmp_path / 'news' / str(news.pk) / 'index.html'
+        assert page.exists()
+
+        response = anonymous_client.get(url)
+        assert response.streaming
+        assert b''.join(response.streaming_content) == page.read_bytes()
+        assert response['X-Frame-Options'] == 'DENY'
+        assert response['X-Content-Type-Options'] == 'nosniff'
+        assert not author_client.get(url).streaming
+        response = anonymous_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(
+            b''.join(response.streaming_content)
+        ) == page.read_bytes()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            services.add_comment(
+                news, author, Comment(text='Новый комментарий')
+            )
+        assert 'Новый комментарий' in page.read_text()
+        assert 'Комментариев: 1' in (tmp_path / 'index.html').read_text()
+
+    def test_prerendered_page_removed_with_news(
+        self,
+        settings,
+        tmp_path,
+        news,
+        anonymous_client,
+        django_capture_on_commit_callbacks
+    ):
+        """Страница удалённой в транзакции новости удаляется с диска."""
+        settings.PRERENDER_ROOT = tmp_path
+        call_command('prerender', stdout=StringIO())
+        url = reverse('news:detail', args=[news.pk])
+        page = tmp_path / 'news' / str(news.pk) / 'index.html'
+        assert page.exists()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                news.delete()
+        assert not page.exists()
+        assert anonymous_client.get(url).status_code == 404
+
+    def test_static_files_served_precompressed(self, settings, tmp_path):
+        """Статика отдаётся сжатой копией и кешируется по хешу в имени."""
+        settings.STATIC_ROOT = tmp_path
+        (tmp_path / 'css').mkdir()
+        (tmp_path / 'css' / 'site.0123456789ab.css').write_text('body {}')
+        (tmp_path / 'css' / 'site.0123456789ab.css.gz').write_bytes(b'gz')
+        path = '/static/css/site.0123456789ab.css'
+        status, headers, file = static_response(
+            path, {'accept-encoding': 'gzip, deflate'}
+        )
+        headers = dict(headers)
+        assert status == 200
+        assert file.name.endswith('.gz')
+        assert headers['Content-Encoding'] == 'gzip'
+        assert 'immutable' in headers['Cache-Control']
+        assert 'Content-Encoding' not in dict(static_response(path, {})[1])
+        assert static_response('/static/../db.sqlite3', {}) is None
+        assert static_response('/static/\x00', {}) is None
+
+    def test_project_templates_have_no_n_plus_one(self):
+        assert check_n_plus_one() == []
+
+    def test_n_plus_one_found_in_template_loops(self):
+        """Связи в циклах без prefetch_related считаются N+1."""
+        template = Template(
+            '{% for news in object_list %}\n'
+            '  {{ news.comment_set.count }}\n'
+            '  {% for comment in news.comment_set.all %}\n'
+            '    {% if comment.author == user %}{{ comment }}{% endif %}\n'
+            '  {% endfor %}\n'
+            '{% endfor %}'
+        )
+
+        class Listing(generic.ListView):
+            model = News
+
+        class PrefetchedListing(generic.ListView):
+            model = News
+
+            def get_queryset(self):
+                return News.objects.prefetch_related('comment_set__author')
+
+        assert find_n_plus_one(Listing, template) == [
+            ('<unknown source>:2', 'comment_set'),
+            ('<unknown source>:3', 'comment_set'),
+            ('<unknown source>:4', 'comment_set__author'),
+        ]
+        assert find_n_plus_one(PrefetchedListing, template) == []
@@ -1,7 +1,43 @@
+import asyncio
+import gzip
+import json
+import socket
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
 import pytest
+from openpyxl import load_workbook
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import engines
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-
-from news.models import Comment
+from django.utils import timezone
+
+from news import services, trending
+from news.analytics import EngagementReport
+from news.backends import user_key
+from news.caching import LOCK_FILES, KeyLock, page_key
+from news.compression import CompressionMiddleware
+from news.counters import view_counter
+from news.deletion import delete_comments, delete_news, delete_users
+from news.events import MAX_DATAGRAM, broker
+from news.export import csv_lines, export_rows
+from news.factories import make_comments, make_news, make_user
+from news.hll import RELATIVE_ERROR, HyperLogLog
+from news.models import Comment, News
+from news.writer import WriteQueueBusy, submit
+from yanews.middleware import ConcurrencyLimitMiddleware, TokenBucket
+from yanews import warmup
+from yanews.views import hashing_pool
 from news.forms import BAD_WORDS, WARNING
 
 
@@ -94,6 +130,23 @@ class TestLogic:
         assert 'text' in form.errors
         assert WARNING in str(form.errors['text'])
 
+    def test_rejected_comment_page_prefetches_authors(
+        self, settings, news, author, reader, author_client
+    ):
+        """Страница с ошибкой формы не запрашивает авторов по одному."""
+        settings.RATE_LIMITS = {}
+        url = reverse('news:detail', args=[news.pk])
+        data = {'text': f'Текст со словом {BAD_WORDS[0]}'}
+        make_comments(news, author, 2)
+        # Первый запрос кладёт сессию и пользователя в кеш.
+        author_client.post(url, data)
+        with CaptureQueriesContext(connection) as few:
+            author_client.post(url, data)
+        make_comments(news, [author, reader, make_user('third')], 6)
+        with CaptureQueriesContext(connection) as many:
+            author_client.post(url, data)
+        assert len(many) == len(few)
+
     def test_author_can_edit_own_comment(
         self,
         comment,
@@ -227,3 +280,605 @@ class TestLogic:
             url = reverse(name, args=args)
             response = reader_client.get(url)
             assert response.status_code == 404
+
+    def test_comment_counters_follow_comments(
+        self,
+        news,
+        author_client
+    ):
+        """Счётчики новости меняются вместе с комментариями."""
+        url = reverse('news:detail', args=[news.pk])
+        author_client.post(url, {'text': 'Новый комментарий'})
+        comment = Comment.objects.get()
+        news.refresh_from_db()
+        assert news.comment_count == 1
+        assert news.last_commented_at == comment.created
+
+        author_client.post(reverse('news:delete', args=[comment.pk]))
+        news.refresh_from_db()
+        assert news.comment_count == 0
+        assert news.last_commented_at is None
+
+    def test_last_commented_at_never_moves_back(self, news, author):
+        """Комментарий с более ранним временем не сдвигает время назад."""
+        services.add_comment(news, author, Comment(text='Первый'))
+        news.refresh_from_db()
+        latest = news.last_commented_at
+        assert latest is not None
+
+        earlier = Comment(text='Запоздавший')
+        with patch.object(
+            timezone, 'now', return_value=latest - timedelta(minutes=5)
+        ):
+            services.add_comment(news, author, earlier)
+        assert earlier.created < latest
+        news.refresh_from_db()
+        assert news.last_commented_at == latest
+        assert news.comment_count == 2
+
+    def test_admin_moves_comment_between_news(
+        self,
+        admin_client,
+        author,
+        django_capture_on_commit_callbacks
+    ):
+        """Перенос комментария в админке обновляет счётчики обеих новостей."""
+        source, target = make_news(2)
+        comment = services.add_comment(source, author, Comment(text='Текст'))
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post(
+                reverse('admin:news_comment_change', args=[comment.pk]),
+                {'news': target.pk, 'author': author.pk, 'text': 'Текст'},
+            )
+        assert response.status_code == 302
+        source.refresh_from_db()
+        target.refresh_from_db()
+        assert (source.comment_count, source.last_commented_at) == (0, None)
+        assert target.comment_count == 1
+        assert target.last_commented_at == comment.created
+        assert target.unique_commenters == 1
+        assert services.reconcile_comment_counters(
+            News.objects.filter(pk=target.pk)
+        ) == 0
+
+    def test_news_fixture_loads(self):
+        """Заготовленные новости из README загружаются командой loaddata."""
+        call_command('loaddata', 'news.json', stdout=StringIO())
+        assert News.objects.count() == 19
+        assert not News.objects.filter(updated__isnull=True).exists()
+        assert not News.objects.filter(excerpt='').exists()
+
+    def test_reconcile_comment_counts(
+        self,
+        comment,
+        other_comment
+    ):
+        """Команда исправляет расхождения счётчиков с комментариями."""
+        call_command('reconcile_comment_counts', stdout=StringIO())
+        news = comment.news
+        news.refresh_from_db()
+        assert news.comment_count == 2
+        assert news.last_commented_at == max(
+            comment.created, other_comment.created
+        )
+
+    @pytest.mark.parametrize('enabled', (True, False))
+    def test_new_comment_published_to_stream(
+        self,
+        settings,
+        news,
+        author,
+        django_capture_on_commit_callbacks,
+        enabled
+    ):
+        """Новый комментарий попадает в поток, только если он включён."""
+        settings.NEWS_EVENTS_ENABLED = enabled
+
+        async def subscribe():
+            return broker.subscribe(news.pk)
+
+        loop = asyncio.new_event_loop()
+        try:
+            queue = loop.run_until_complete(subscribe())
+            with django_capture_on_commit_callbacks(execute=True):
+                comment = Comment.objects.create(
+                    news=news, author=author, text='Комментарий'
+                )
+            if not enabled:
+                assert queue.empty()
+                return
+            event = loop.run_until_complete(asyncio.wait_for(queue.get(), 1))
+        finally:
+            broker.unsubscribe(news.pk, queue)
+            loop.close()
+        assert event['id'] == comment.pk
+        assert event['author'] == author.username
+
+    def test_publish_not_blocked_by_full_socket(self, settings, tmp_path):
+        """Процесс, который не читает сокет, не задерживает публикацию."""
+        settings.NEWS_EVENTS_SOCKET_DIR = tmp_path
+        event = {'id': 1, 'news': 1, 'text': 'я' * MAX_DATAGRAM}
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as peer:
+            peer.bind(str(tmp_path / 'peer.sock'))
+            started = time.monotonic()
+            for _ in range(100):
+                broker.publish(event)
+            assert time.monotonic() - started < 5
+            peer.setblocking(False)
+            data = peer.recv(MAX_DATAGRAM + 1)
+        assert len(data) <= MAX_DATAGRAM
+        assert json.loads(data)['id'] == 1
+
+    def test_views_counted_and_listed(
+        self,
+        settings,
+        multiple_news,
+        anonymous_client
+    ):
+        """Просмотры новости учитываются в списке самых читаемых."""
+        settings.NEWS_VIEWS_FLUSH_INTERVAL = 0
+        view_counter.reset()
+        oldest = multiple_news[-1]
+        url = reverse('news:detail', args=[oldest.pk])
+        anonymous_client.get(url)
+        anonymous_client.get(url)
+
+        oldest.refresh_from_db()
+        assert oldest.views == 2
+        response = anonymous_client.get(reverse('news:popular'))
+        assert response.context['object_list'][0] == oldest
+
+    def test_views_kept_when_flush_fails(
+        self,
+        news,
+        anonymous_client
+    ):
+        """Ошибка записи просмотров не ломает страницу и их не теряет."""
+        view_counter.reset()
+        url = reverse('news:detail', args=[news.pk])
+        with patch.object(
+            QuerySet, 'update', side_effect=OperationalError('locked')
+        ):
+            assert anonymous_client.get(url).status_code == 200
+        assert view_counter.flush()
+        news.refresh_from_db()
+        assert news.views == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_views_flushed_in_background(self, settings, news):
+        """Фоновый поток сбрасывает просмотры без участия запросов."""
+        settings.NEWS_VIEWS_FLUSH_INTERVAL = 0.05
+        view_counter.reset()
+        view_counter.incr(news.pk)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            news.refresh_from_db()
+            if news.views:
+                break
+            time.sleep(0.05)
+        assert news.views == 1
+
+    def test_trending_follows_comments(
+        self,
+        multiple_news,
+        author_client,
+        django_capture_on_commit_callbacks
+    ):
+        """Обсуждаемая новость попадает в рейтинг и после его пересборки."""
+        cache.clear()
+        discussed = multiple_news[-1]
+        with django_capture_on_commit_callbacks(execute=True):
+            author_client.post(
+                reverse('news:detail', args=[discussed.pk]),
+                {'text': 'Комментарий'}
+            )
+        url = reverse('news:trending')
+        assert author_client.get(url).context['object_list'] == [discussed]
+
+        cache.clear()
+        call_command('rebuild_trending', stdout=StringIO())
+        assert author_client.get(url).context['object_list'] == [discussed]
+
+    def test_unique_commenters_estimated(
+        self,
+        news,
+        author_client,
+        reader_client
+    ):
+        """У новости оценивается число разных комментаторов."""
+        url = reverse('news:detail', args=[news.pk])
+        for client in (author_client, author_client, reader_client):
+            client.post(url, {'text': 'Комментарий'})
+        news.refresh_from_db()
+        assert news.comment_count == 3
+        assert news.unique_commenters == 2
+
+    def test_hyperloglog_error_is_bounded(self):
+        """Оценка HyperLogLog и объединение скетчей укладываются в ошибку."""
+        first, second = HyperLogLog(), HyperLogLog()
+        for value in range(20000):
+            first.add(value)
+            second.add(value + 10000)
+        merged = HyperLogLog(first.to_bytes()).merge(second)
+        assert abs(merged.count() - 30000) < 30000 * RELATIVE_ERROR * 3
+
+    def test_page_cache_serves_stale_while_revalidating(
+        self,
+        settings,
+        comment,
+        author,
+        anonymous_client
+    ):
+        """Пока страницу пересчитывают, остальные получают старую копию."""
+        settings.NEWS_CACHEABLE_PAGES = True
+        settings.PAGE_CACHE_TIMEOUT = 60
+        cache.clear()
+        url = reverse('news:detail', args=[comment.news.pk])
+        first = anonymous_client.get(url)
+        assert first.context is not None
+        assert anonymous_client.get(url).context is None
+
+        Comment.objects.create(
+            news=comment.news, author=author, text='Свежий комментарий'
+        )
+        lock = KeyLock(page_key('http://testserver' + url, ''))
+        assert lock.acquire()
+        try:
+            stale = anonymous_client.get(url)
+        finally:
+            lock.release()
+        assert stale.content == first.content
+        # Устаревшая копия идёт со своими валидаторами, а не с текущими.
+        assert stale['ETag'] == first['ETag']
+        assert not stale.has_header('Last-Modified')
+        assert 'no-cache' in stale['Cache-Control']
+        revalidated = anonymous_client.get(
+            url, HTTP_IF_NONE_MATCH=stale['ETag']
+        )
+        assert revalidated.status_code == 200
+        assert 'Свежий комментарий' in revalidated.content.decode()
+        assert revalidated['ETag'] != stale['ETag']
+
+    def test_page_lock_files_bounded(self, settings, tmp_path):
+        """Файлов блокировок не больше LOCK_FILES при любом числе ключей."""
+        settings.PAGE_CACHE_LOCK_DIR = tmp_path
+        for variant in range(LOCK_FILES * 4):
+            lock = KeyLock(page_key('http://testserver/', variant))
+            assert lock.acquire()
+            lock.release()
+        assert len(list(tmp_path.iterdir())) <= LOCK_FILES
+
+    def test_page_cache_stores_compressed_body(
+        self,
+        settings,
+        comment,
+        anonymous_client
+    ):
+        """В кеше страниц лежит уже сжатое тело для клиентов с gzip."""
+        settings.NEWS_CACHEABLE_PAGES = True
+        settings.PAGE_CACHE_TIMEOUT = 60
+        cache.clear()
+        url = reverse('news:detail', args=[comment.news.pk])
+        anonymous_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        entry = cache.get(page_key('http://testserver' + url, '|gzip'))
+        assert entry['headers']['Content-Encoding'] == 'gzip'
+
+        cached = anonymous_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        assert cached.context is None
+        assert cached.content == entry['content']
+        assert cached['ETag'].startswith('W/')
+        plain = anonymous_client.get(url)
+        assert plain.context is not None
+        assert gzip.decompress(cached.content) == plain.content
+
+    def test_compression_skips_events_and_small_responses(self):
+        """Поток событий и маленькие ответы не сжимаются, CSV — сжимается."""
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        responses = {
+            'events': StreamingHttpResponse(
+                iter([b'data: 1\n\n']), content_type='text/event-stream'
+            ),
+            'small': HttpResponse('<p>Новость</p>'),
+            'csv': StreamingHttpResponse(
+                iter([b'a,b\n'] * 1000), content_type='text/csv'
+            ),
+        }
+        encodings = {
+            name: CompressionMiddleware(
+                lambda request: response
+            )(request).get('Content-Encoding')
+            for name, response in responses.items()
+        }
+        assert encodings == {'events': None, 'small': None, 'csv': 'gzip'}
+
+    def test_session_and_user_served_from_cache(
+        self,
+        news,
+        author,
+        author_client
+    ):
+        """Сессия и пользователь берутся из кеша до смены пароля."""
+        cache.clear()
+        url = reverse('news:comment_form', args=[news.pk])
+        author_client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            assert author_client.get(url).content
+        auth_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "django_session"' in query['sql']
+            or 'FROM "auth_user"' in query['sql']
+        ]
+        assert auth_queries == []
+        assert cache.get(user_key(author.pk)) is not None
+
+        author.set_password('new-password')
+        author.save()
+        assert cache.get(user_key(author.pk)) is None
+        assert author_client.get(url).content == b''
+
+    @pytest.mark.django_db(transaction=True)
+    def test_login_upgrades_outdated_password_hash(
+        self,
+        django_user_model,
+        anonymous_client
+    ):
+        """Вход обновляет устаревший хеш, и сессия остаётся действительной."""
+        user = django_user_model.objects.create(
+            username='old-hash',
+            password=PBKDF2PasswordHasher().encode(
+                'password123', 'salt', iterations=1000
+            ),
+        )
+        response = anonymous_client.post(
+            reverse('users:login'),
+            {'username': 'old-hash', 'password': 'password123'}
+        )
+        assert response.status_code == 302
+        user.refresh_from_db()
+        assert not user.password.startswith('pbkdf2_sha256$1000$')
+        assert user.check_password('password123')
+        form_url = reverse('news:comment_form', args=[1])
+        assert anonymous_client.get(form_url).content
+
+    def test_login_shed_when_hashing_pool_full(self, author, anonymous_client):
+        """Когда пул хеширования занят, вход сразу получает 503."""
+        hashing_pool._ensure_started()
+        acquired = 0
+        while hashing_pool.slots.acquire(blocking=False):
+            acquired += 1
+        try:
+            response = anonymous_client.post(
+                reverse('users:login'),
+                {'username': 'author', 'password': 'password123'}
+            )
+        finally:
+            for _ in range(acquired):
+                hashing_pool.slots.release()
+        assert response.status_code == 503
+        assert 'Retry-After' in response
+
+    def test_warmup_compiles_templates_and_resolves_urls(self):
+        """Прогрев компилирует шаблоны новостей и проходит маршруты."""
+        timings = {title: count for title, count, _ in warmup.run()}
+        assert timings['маршруты'] > 0
+        assert timings['шаблоны'] > 0
+        loader = engines['django'].engine.template_loaders[0]
+        assert {'news/home.html', 'news/detail.html'} <= set(
+            loader.get_template_cache
+        )
+
+    def test_writes_shed_when_saturated(self):
+        """Сверх лимита запись сразу получает 503 с Retry-After."""
+        middleware = ConcurrencyLimitMiddleware(lambda request: HttpResponse())
+        write_limit = middleware.limits['write']
+        while write_limit.try_acquire():
+            pass
+        request = RequestFactory().post('/news/1/')
+        response = middleware(request)
+        assert response.status_code == 503
+        assert 'Retry-After' in response
+        assert middleware(RequestFactory().get('/')).status_code == 200
+
+    def test_comment_posts_rate_limited(self, settings, news, author_client):
+        """Сверх запаса токенов комментарий получает 429 без записи в БД."""
+        settings.RATE_LIMITS = {
+            'news:detail': {'user': {'burst': 2, 'per_minute': 1}},
+        }
+        cache.clear()
+        url = reverse('news:detail', args=[news.pk])
+        for _ in range(2):
+            author_client.post(url, {'text': 'Комментарий'})
+        response = author_client.post(url, {'text': 'Комментарий'})
+        assert response.status_code == 429
+        assert 'Retry-After' in response
+        assert Comment.objects.count() == 2
+        assert author_client.get(url).status_code == 200
+
+    def test_rate_limit_survives_new_login(
+        self, settings, client, news, author, author_client
+    ):
+        """Повторный вход не даёт пользователю новую корзину токенов."""
+        settings.RATE_LIMITS = {
+            'news:detail': {'user': {'burst': 1, 'per_minute': 1}},
+        }
+        cache.clear()
+        url = reverse('news:detail', args=[news.pk])
+        author_client.post(url, {'text': 'Комментарий'})
+        client.force_login(author)
+        assert client.post(url, {'text': 'Комментарий'}).status_code == 429
+
+    def test_busy_bucket_lock_throttles(self):
+        """Если блокировка корзины занята, запрос ограничивается."""
+        cache.clear()
+        bucket = TokenBucket('ratelimit.test', burst=1, per_minute=1)
+        cache.add(bucket.key + '.lock', 1)
+        try:
+            with patch('yanews.middleware.BUCKET_LOCK_WAIT', 0.01):
+                assert bucket.take() > 0
+        finally:
+            cache.delete(bucket.key + '.lock')
+        # Токен не списан.
+        assert bucket.take() == 0
+        assert bucket.take() > 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_comments_written_through_queue(
+        self, settings, news, author_client
+    ):
+        """Через очередь записи комментарий сохраняется до ответа."""
+        settings.WRITE_QUEUE_ENABLED = True
+        url = reverse('news:detail', args=[news.pk])
+        response = author_client.post(url, {'text': 'Комментарий'})
+        assert response.status_code == 302
+        news.refresh_from_db()
+        assert news.comment_count == 1
+        assert Comment.objects.get().text == 'Комментарий'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_write_succeeds_when_on_commit_fails(
+        self, settings, caplog, news, author
+    ):
+        """Ошибка обработчика после фиксации не выдаётся за ошибку записи."""
+        settings.WRITE_QUEUE_ENABLED = True
+
+        def fail():
+            raise RuntimeError('Обработчик упал')
+
+        def create():
+            transaction.on_commit(fail)
+            return Comment.objects.create(
+                news=news, author=author, text='Комментарий'
+            )
+
+        comment = submit(create)
+        assert Comment.objects.filter(pk=comment.pk).exists()
+        assert 'on_commit' in caplog.text
+
+    def test_write_queue_busy_returns_503(self):
+        """Если очередь не приняла запись, ответ — 503 с Retry-After."""
+        middleware = ConcurrencyLimitMiddleware(lambda request: None)
+        request = RequestFactory().post('/news/1/')
+        response = middleware.process_exception(
+            request, WriteQueueBusy('Очередь записи переполнена')
+        )
+        assert response.status_code == 503
+        assert 'Retry-After' in response
+
+    def test_purge_old_comments(self, comment, other_comment):
+        """Старые комментарии удаляются, счётчики новости пересчитываются."""
+        Comment.objects.filter(pk=comment.pk).update(
+            created=comment.created - timedelta(days=30)
+        )
+        call_command(
+            'purge_old_comments', '7', '--chunk-size', '1', stdout=StringIO()
+        )
+        assert list(Comment.objects.all()) == [other_comment]
+        news = other_comment.news
+        news.refresh_from_db()
+        assert news.comment_count == 1
+        assert news.unique_commenters == 1
+        assert news.last_commented_at == other_comment.created
+
+    def test_chunked_deletion_of_users_and_news(
+        self,
+        django_user_model,
+        author,
+        comment,
+        other_comment
+    ):
+        """Пользователь и новость удаляются вместе с комментариями."""
+        assert delete_users(
+            django_user_model.objects.filter(pk=author.pk), chunk_size=1
+        ) == (1, 1)
+        news = other_comment.news
+        news.refresh_from_db()
+        assert news.comment_count == 1
+        assert delete_news(News.objects.all(), chunk_size=1) == (1, 1)
+        assert not Comment.objects.exists()
+
+    def test_chunked_deletion_sends_signals(
+        self,
+        news,
+        author,
+        django_capture_on_commit_callbacks
+    ):
+        """Удаление порциями отправляет сигналы, но рейтинг считает раз."""
+        make_comments(news, author, 5)
+        deleted = []
+
+        def receiver(sender, instance, **kwargs):
+            deleted.append(instance.pk)
+
+        post_delete.connect(receiver, sender=Comment)
+        try:
+            with patch.object(trending, 'comment_removed') as removed:
+                with django_capture_on_commit_callbacks(execute=True):
+                    assert delete_comments(
+                        Comment.objects.all(), chunk_size=2
+                    ) == 5
+        finally:
+            post_delete.disconnect(receiver, sender=Comment)
+        assert len(deleted) == 5
+        removed.assert_not_called()
+        news.refresh_from_db()
+        assert news.comment_count == 0
+
+    def test_export_news_to_xlsx(self, tmp_path, news, comment):
+        """Команда выгружает новость с комментариями в XLSX."""
+        empty = News.objects.create(title='Без комментариев', text='Текст')
+        output = tmp_path / 'news.xlsx'
+        call_command('export_news', str(output), stdout=StringIO())
+        rows = list(load_workbook(output).active.values)
+        assert len(rows) == 3
+        assert rows[1][0] == news.pk
+        assert rows[1][-1] == comment.text
+        assert rows[2][:2] == (empty.pk, empty.title)
+        assert rows[2][3] is None
+
+    def test_export_escapes_formulas(self, tmp_path, author):
+        """Значения, похожие на формулы, выгружаются как текст."""
+        news = News.objects.create(title='=1+1', text='Текст')
+        Comment.objects.create(
+            news=news, author=author, text='=HYPERLINK("http://example.com")'
+        )
+        output = tmp_path / 'news.xlsx'
+        call_command('export_news', str(output), stdout=StringIO())
+        row = next(load_workbook(output).active.iter_rows(min_row=2))
+        assert row[1].value == "'=1+1"
+        assert row[-1].value == '\'=HYPERLINK("http://example.com")'
+        assert {row[1].data_type, row[-1].data_type} == {'s'}
+        lines = ''.join(csv_lines(export_rows(News.objects.all())))
+        assert "'=HYPERLINK" in lines
+        assert ',=' not in lines
+
+    def test_vendor_bootstrap_checks_hash(self, settings, tmp_path):
+        """Файл с чужим хешем не попадает в статику."""
+        settings.STATICFILES_DIRS = [tmp_path]
+        with patch(
+            'news.management.commands.vendor_bootstrap.urlopen',
+            side_effect=lambda *args, **kwargs: BytesIO(b'body {}'),
+        ):
+            with pytest.raises(CommandError):
+                call_command('vendor_bootstrap', stdout=StringIO())
+        assert not (tmp_path / 'css').exists()
+
+    def test_news_analytics_report(self, tmp_path, news, comment, reader):
+        """Отчёт считает комментарии по дням, вовлечённость и когорты."""
+        Comment.objects.create(news=news, author=reader, text='Ещё один')
+        call_command('news_analytics', str(tmp_path), stdout=StringIO())
+        for name in ('report.html', 'comments_per_day.png', 'engagement.png',
+                     'retention.png'):
+            assert (tmp_path / name).exists()
+        per_day = (tmp_path / 'comments_per_day.csv').read_text()
+        assert per_day.strip().splitlines()[-1].endswith(',2')
+        retention = (tmp_path / 'retention.csv').read_text().splitlines()
+        assert retention[1].endswith(',1.0,2')
+
+    def test_analytics_skips_news_added_after_snapshot(
+        self, news, comment, author
+    ):
+        """Новость, созданная во время отчёта, не ломает подсчёт."""
+        report = EngagementReport()
+        later = News.objects.create(title='Позже', text='Текст')
+        Comment.objects.create(news=later, author=author, text='Комментарий')
+        assert report.collect().comments == 1
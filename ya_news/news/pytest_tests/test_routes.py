@@ -27,6 +27,20 @@ class TestRoutes:
         response = anonymous_client.get(url)
         assert response.status_code == 200
 
+    @pytest.mark.parametrize('enabled, status', ((False, 404), (True, 501)))
+    def test_comment_stream_not_served_by_wsgi(
+        self,
+        settings,
+        anonymous_client,
+        news,
+        enabled,
+        status
+    ):
+        """Бесконечный поток не занимает рабочий процесс WSGI."""
+        settings.NEWS_EVENTS_ENABLED = enabled
+        url = reverse('news:comment_stream', args=[news.pk])
+        assert anonymous_client.get(url).status_code == status
+
     def test_comment_edit_available_to_author(
         self,
         author_client,
@@ -128,3 +142,16 @@ class TestRoutes:
             'logout',
         ]
     )
+    def test_auth_pages_available_to_anonymous(
+        self,
+        anonymous_client,
+        url_name
+    ):
+        """Страницы входа и выхода доступны анонимному пользователю."""
+        url = reverse(f'users:{url_name}')
+        # С Django 5.0 выход выполняется только POST-запросом.
+        if url_name == 'logout':
+            response = anonymous_client.post(url)
+        else:
+            response = anonymous_client.get(url)
+        assert response.status_code == 200
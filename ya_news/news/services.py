@@ -0,0 +1,163 @@
+"""
+Операции с комментариями.
+
+Новость хранит число комментариев, время последнего из них и скетч
+HyperLogLog для оценки числа разных комментаторов. Эти поля меняются
+в той же транзакции, что и сами комментарии, а расхождения исправляет
+команда reconcile_comment_counts.
+"""
+from copy import copy
+
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from . import prerender, trending
+from .hll import HyperLogLog
+from .models import Comment, News
+
+
+def add_comment(news, author, comment):
+    """Сохраняет новый комментарий и обновляет счётчики новости."""
+    with transaction.atomic():
+        comment.news = news
+        comment.author = author
+        comment.save()
+        _count_added(news.pk, comment)
+        _add_commenter(news.pk, author.pk)
+    return comment
+
+
+def _count_added(news_id, comment):
+    created = Value(comment.created)
+    # Комментарий, зафиксированный позже, может быть создан раньше
+    # уже учтённого: время последнего комментария не уменьшается.
+    News.objects.filter(pk=news_id).update(
+        comment_count=F('comment_count') + 1,
+        last_commented_at=Greatest(
+            Coalesce('last_commented_at', created), created
+        ),
+    )
+
+
+def _add_commenter(news_id, author_id):
+    sketch = HyperLogLog(
+        News.objects.select_for_update().filter(
+            pk=news_id
+        ).values_list('commenters_sketch', flat=True).get()
+    )
+    if sketch.add(author_id):
+        News.objects.filter(pk=news_id).update(
+            commenters_sketch=sketch.to_bytes(),
+            unique_commenters=sketch.count(),
+        )
+
+
+def delete_comment(comment):
+    """Удаляет комментарий и обновляет счётчики новости."""
+    with transaction.atomic():
+        comment.delete()
+        _count_removed(comment.news_id)
+
+
+def _count_removed(news_id):
+    News.objects.filter(pk=news_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        last_commented_at=Subquery(
+            Comment.objects.filter(
+                news=OuterRef('pk')
+            ).order_by('-created').values('created')[:1]
+        ),
+    )
+
+
+def update_comment(comment, old_news_id):
+    """
+    Сохраняет изменённый комментарий.
+
+    Если комментарий перенесён из новости old_news_id в другую,
+    счётчики обеих новостей, рейтинг обсуждаемых и заранее отрисованные
+    страницы обновляются. Скетч старой новости не уменьшается, как и при
+    удалении комментария: его поправит reconcile_comment_counts.
+    """
+    with transaction.atomic():
+        comment.save()
+        if comment.news_id != old_news_id:
+            _count_removed(old_news_id)
+            _count_added(comment.news_id, comment)
+            transaction.on_commit(
+                lambda: _comment_moved(comment, old_news_id)
+            )
+        # Автора тоже могли сменить.
+        _add_commenter(comment.news_id, comment.author_id)
+    return comment
+
+
+def _comment_moved(comment, old_news_id):
+    old = copy(comment)
+    old.news_id = old_news_id
+    trending.comment_removed(old)
+    trending.comment_added(comment)
+    prerender.news_changed([old_news_id])
+
+
+def reconcile_comment_counters(news_queryset):
+    """
+    Пересчитывает счётчики и скетчи для новостей из выборки.
+
+    Выборка должна быть небольшой: она читается целиком и исправляется
+    одной короткой транзакцией. Возвращает число исправленных новостей.
+    """
+    fields = (
+        'comment_count',
+        'last_commented_at',
+        'commenters_sketch',
+        'unique_commenters',
+    )
+    with transaction.atomic():
+        news_list = list(news_queryset.only('pk', *fields))
+        actual = {
+            row['news']: row
+            for row in Comment.objects.filter(
+                news__in=news_list
+            ).order_by().values('news').annotate(
+                count=Count('pk'), last=Max('created')
+            )
+        }
+        sketches = {}
+        for news_id, author_id in Comment.objects.filter(
+            news__in=news_list
+        ).order_by().values_list('news', 'author').distinct():
+            sketches.setdefault(news_id, HyperLogLog()).add(author_id)
+        drifted = []
+        for news in news_list:
+            row = actual.get(news.pk, {'count': 0, 'last': None})
+            sketch = sketches.get(news.pk)
+            expected = (
+                row['count'],
+                row['last'],
+                sketch.to_bytes() if sketch else b'',
+                sketch.count() if sketch else 0,
+            )
+            current = tuple(getattr(news, field) for field in fields)
+            if current != expected:
+                for field, value in zip(fields, expected):
+                    setattr(news, field, value)
+                drifted.append(news)
+        News.objects.bulk_update(drifted, fields)
+    return len(drifted)
+
+
+def unique_commenters(news_queryset):
+    """
+    Оценка числа разных комментаторов у всех новостей выборки.
+
+    Например, за период: unique_commenters(News.objects.filter(
+    date__range=(start, end))).
+    """
+    sketch = HyperLogLog()
+    for data in news_queryset.values_list(
+        'commenters_sketch', flat=True
+    ).iterator():
+        sketch.merge(HyperLogLog(data))
+    return sketch.count()
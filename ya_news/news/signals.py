@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import deletion, prerender, trending
+from .backends import forget_user
+from .events import broker, comment_event
+from .models import Comment, News
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created, **kwargs):
+    """Отправляет новый комментарий подписчикам потока SSE."""
+    if created and settings.NEWS_EVENTS_ENABLED:
+        event = comment_event(instance)
+        transaction.on_commit(lambda: broker.publish(event))
+
+
+@receiver(post_save, sender=Comment)
+def rank_new_comment(sender, instance, created, **kwargs):
+    """Поднимает новость в рейтинге обсуждаемых."""
+    if created:
+        transaction.on_commit(lambda: trending.comment_added(instance))
+
+
+@receiver(post_delete, sender=Comment)
+def rank_deleted_comment(sender, instance, **kwargs):
+    """Опускает новость в рейтинге обсуждаемых."""
+    if deletion.in_bulk_deletion():
+        return
+    transaction.on_commit(lambda: trending.comment_removed(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def prerender_commented_news(sender, instance, **kwargs):
+    """Пересобирает заранее отрисованную страницу новости и главную."""
+    if prerender.enabled() and not deletion.in_bulk_deletion():
+        transaction.on_commit(
+            lambda: prerender.news_changed([instance.news_id])
+        )
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def prerender_news(sender, instance, **kwargs):
+    """Пересобирает или удаляет страницу новости и пересобирает главную."""
+    if prerender.enabled():
+        # После удаления pk обнуляется раньше, чем сработает on_commit.
+        pk = instance.pk
+        transaction.on_commit(lambda: prerender.news_changed([pk]))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_changed_user(sender, instance, **kwargs):
+    """Удаляет изменённого пользователя из кеша аутентификации."""
+    # Удаляем сразу и после фиксации: до неё другой запрос мог снова
+    # положить в кеш старую строку. pk запоминается, потому что после
+    # удаления он обнуляется раньше, чем сработает on_commit.
+    pk = instance.pk
+    forget_user(pk)
+    transaction.on_commit(lambda: forget_user(pk))
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    """Удаляет вышедшего пользователя из кеша аутентификации."""
+    if user is not None:
+        forget_user(user.pk)
@@ -0,0 +1,134 @@
+"""
+Поток новых комментариев к новости (Server-Sent Events).
+
+Обработчик ASGI в Django держит отдельный поток на каждый незавершённый
+запрос, поэтому в yanews.asgi поток комментариев обслуживается напрямую,
+в обход синхронных промежуточных слоёв: простаивающее подключение — это
+одна сопрограмма и одна очередь брокера.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import Resolver404, resolve
+
+from .events import broker, comment_event, format_event
+from .models import Comment, News
+
+STREAM_VIEW_NAME = 'news:comment_stream'
+STREAM_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+
+def _in_thread_pool(func):
+    """Запрос к БД в общем пуле потоков, без отдельного потока на клиента."""
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+@_in_thread_pool
+def news_exists(pk):
+    return News.objects.filter(pk=pk).exists()
+
+
+@_in_thread_pool
+def missed_events(pk, last_id):
+    return [
+        comment_event(comment)
+        for comment in Comment.objects.filter(
+            news_id=pk, pk__gt=last_id
+        ).select_related('author').order_by('pk')
+    ]
+
+
+async def comment_events(pk, last_event_id=None):
+    """Текст потока: пропущенные комментарии, затем новые по мере появления."""
+    queue = broker.subscribe(pk)
+    try:
+        last_id = 0
+        if last_event_id and last_event_id.isdigit():
+            # Клиент переподключился: досылаем пропущенное.
+            last_id = int(last_event_id)
+            for event in await missed_events(pk, last_id):
+                last_id = event['id']
+                yield format_event(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), settings.NEWS_EVENTS_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+            if event['id'] > last_id:
+                yield format_event(event)
+    finally:
+        broker.unsubscribe(pk, queue)
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def serve_comment_stream(scope, receive, send, pk):
+    """Приложение ASGI для одного подключения к потоку."""
+    if not await news_exists(pk):
+        await send({'type': 'http.response.start', 'status': 404})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    headers = dict(scope['headers'])
+    last_event_id = headers.get(b'last-event-id', b'').decode('latin-1')
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': STREAM_HEADERS,
+    })
+
+    async def pump():
+        async for chunk in comment_events(pk, last_event_id):
+            await send({
+                'type': 'http.response.body',
+                'body': chunk.encode(),
+                'more_body': True,
+            })
+
+    tasks = {
+        asyncio.create_task(pump()),
+        asyncio.create_task(_wait_for_disconnect(receive)),
+    }
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def with_comment_streams(application):
+    """Оборачивает ASGI-приложение Django, перехватывая потоки комментариев."""
+    async def router(scope, receive, send):
+        if (
+            settings.NEWS_EVENTS_ENABLED
+            and scope['type'] == 'http'
+            and scope['method'] == 'GET'
+        ):
+            try:
+                match = resolve(scope['path'])
+            except Resolver404:
+                match = None
+            if match is not None and match.view_name == STREAM_VIEW_NAME:
+                return await serve_comment_stream(
+                    scope, receive, send, match.kwargs['pk']
+                )
+        return await application(scope, receive, send)
+    return router
@@ -0,0 +1,96 @@
+"""
+Рейтинг обсуждаемых новостей.
+
+Вес новости — сумма вкладов её комментариев; вклад комментария
+уменьшается вдвое каждые NEWS_TRENDING_HALF_LIFE секунд. Рейтинг лежит
+в кеше под одним ключом: словарь {id новости: (вес, момент расчёта)}
+не больше NEWS_TRENDING_CAPACITY записей. Он меняется при создании и
+удалении комментариев, а команда rebuild_trending периодически
+пересобирает его по БД: это исправляет потерянные при гонках обновления.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Comment
+
+CACHE_KEY = 'news:trending'
+# Комментарии старше этого числа периодов полураспада почти ничего
+# не весят и при пересборке не читаются.
+WINDOW_HALF_LIVES = 10
+
+_lock = threading.Lock()
+
+
+def _decay(score, since, now):
+    return score * 0.5 ** ((now - since) / settings.NEWS_TRENDING_HALF_LIFE)
+
+
+def _weight(created, now):
+    return _decay(1.0, created.timestamp(), now)
+
+
+def _decayed(scores, now):
+    return {
+        news_id: _decay(score, since, now)
+        for news_id, (score, since) in scores.items()
+    }
+
+
+def _store(scores, now):
+    if len(scores) > settings.NEWS_TRENDING_CAPACITY:
+        current = _decayed(scores, now)
+        kept = sorted(current, key=current.get, reverse=True)
+        scores = {
+            news_id: scores[news_id]
+            for news_id in kept[:settings.NEWS_TRENDING_CAPACITY]
+        }
+    cache.set(CACHE_KEY, scores, timeout=None)
+
+
+def _update(news_id, delta, now):
+    with _lock:
+        scores = cache.get(CACHE_KEY, {})
+        score, since = scores.get(news_id, (0.0, now))
+        score = _decay(score, since, now) + delta
+        if score > 0:
+            scores[news_id] = (score, now)
+        else:
+            scores.pop(news_id, None)
+        _store(scores, now)
+
+
+def comment_added(comment):
+    now = time.time()
+    _update(comment.news_id, _weight(comment.created, now), now)
+
+
+def comment_removed(comment):
+    now = time.time()
+    _update(comment.news_id, -_weight(comment.created, now), now)
+
+
+def top_news_ids(limit):
+    """Идентификаторы самых обсуждаемых новостей: одно чтение из кеша."""
+    current = _decayed(cache.get(CACHE_KEY, {}), time.time())
+    return sorted(current, key=current.get, reverse=True)[:limit]
+
+
+def rebuild():
+    """Пересобирает рейтинг по комментариям из БД."""
+    now = time.time()
+    window = WINDOW_HALF_LIVES * settings.NEWS_TRENDING_HALF_LIFE
+    scores = {}
+    comments = Comment.objects.filter(
+        created__gte=datetime.fromtimestamp(now - window, tz=timezone.utc)
+    ).values_list('news_id', 'created').order_by()
+    for news_id, created in comments.iterator(chunk_size=2000):
+        scores[news_id] = scores.get(news_id, 0.0) + _weight(created, now)
+    with _lock:
+        _store(
+            {news_id: (score, now) for news_id, score in scores.items()}, now
+        )
+    return len(scores)
@@ -6,6 +6,8 @@ app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
+    path('popular/', views.NewsPopular.as_view(), name='popular'),
+    path('trending/', views.NewsTrending.as_view(), name='trending'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
     path(
         'delete_comment/<int:pk>/',
@@ -13,4 +15,19 @@ urlpatterns = [
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path(
+        'news/<int:pk>/comments/stream/',
+        views.CommentStream.as_view(),
+        name='comment_stream'
+    ),
+    path(
+        'fragments/user/',
+        views.UserNavFragment.as_view(),
+        name='user_nav'
+    ),
+    path(
+        'fragments/news/<int:pk>/comment_form/',
+        views.CommentFormFragment.as_view(),
+        name='comment_form'
+    ),
 ]
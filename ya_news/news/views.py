@@ -1,14 +1,76 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import prefetch_related_objects
+from django.http import (
+    Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
+from . import conditional, services, trending, writer
+from .caching import single_flight_cache
+from .counters import view_counter
+from .streams import comment_events
 from .forms import CommentForm
 from .models import Comment, News
 
+# Полный текст и скетч комментаторов в списках новостей не нужны.
+LISTING_DEFERRED_FIELDS = ('text', 'commenters_sketch')
 
-class NewsList(generic.ListView):
+
+def shared_page_variant(request):
+    """Общие для всех страницы кешируются одной записью на адрес."""
+    return '' if settings.NEWS_CACHEABLE_PAGES else None
+
+
+class CacheablePageMixin:
+    """
+    Страница, общая для всех пользователей.
+
+    В режиме NEWS_CACHEABLE_PAGES ответ не зависит от пользователя
+    и может храниться в общих кешах и на обратном прокси.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if (
+            settings.NEWS_CACHEABLE_PAGES
+            and request.method in ('GET', 'HEAD')
+        ):
+            patch_cache_control(
+                response, public=True, max_age=settings.NEWS_PAGE_MAX_AGE
+            )
+        return response
+
+
+class UserFragmentMixin:
+    """Пользовательский фрагмент страницы: кешируется только в браузере."""
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        patch_cache_control(
+            response,
+            private=True,
+            max_age=settings.NEWS_FRAGMENT_MAX_AGE,
+            must_revalidate=True,
+        )
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+
+@method_decorator(
+    (
+        condition(etag_func=conditional.news_list_etag),
+        single_flight_cache(shared_page_variant, conditional.news_list_etag),
+    ),
+    name='get'
+)
+class NewsList(CacheablePageMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
@@ -17,28 +79,122 @@ class NewsList(generic.ListView):
         """
         Выводим только несколько последних новостей.
 
-        Их количество определяется в настройках проекта.
+        Их количество определяется в настройках проекта. Полный текст
+        на главной не нужен: выводится заранее подготовленный анонс.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
+        return self.model.objects.defer(
+            *LISTING_DEFERRED_FIELDS
         )[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
 
-class NewsDetail(generic.DetailView):
+class NewsPopular(CacheablePageMixin, generic.ListView):
+    """Самые читаемые новости."""
+    model = News
+    template_name = 'news/home.html'
+
+    def get_queryset(self):
+        return self.model.objects.defer(
+            *LISTING_DEFERRED_FIELDS
+        ).order_by('-views')[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+
+class NewsTrending(CacheablePageMixin, generic.ListView):
+    """Самые обсуждаемые новости."""
+    model = News
+    template_name = 'news/home.html'
+
+    def get_queryset(self):
+        """Порядок берётся из рейтинга в кеше, новости — одним запросом."""
+        news_ids = trending.top_news_ids(settings.NEWS_COUNT_ON_HOME_PAGE)
+        news = self.model.objects.defer(
+            *LISTING_DEFERRED_FIELDS
+        ).in_bulk(news_ids)
+        return [news[pk] for pk in news_ids if pk in news]
+
+
+@method_decorator(
+    (
+        condition(etag_func=conditional.news_detail_etag),
+        single_flight_cache(shared_page_variant, conditional.news_detail_etag),
+    ),
+    name='get'
+)
+class NewsDetail(CacheablePageMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if request.method == 'GET' and response.status_code in (200, 304):
+            view_counter.incr(self.kwargs['pk'])
+        return response
+
     def get_object(self, queryset=None):
         obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
+            self.model.objects.defer(
+                'commenters_sketch'
+            ).prefetch_related('comment_set__author'),
             pk=self.kwargs['pk']
         )
         return obj
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_authenticated:
+        if (
+            not settings.NEWS_CACHEABLE_PAGES
+            and self.request.user.is_authenticated
+        ):
             context['form'] = CommentForm()
+        context['comment_stream'] = settings.NEWS_EVENTS_ENABLED
+        return context
+
+
+class CommentStream(generic.View):
+    """
+    Поток новых комментариев к новости (Server-Sent Events).
+
+    В yanews.asgi этот адрес обслуживается напрямую news.streams.
+    Под WSGI бесконечный поток навсегда занял бы рабочий процесс,
+    поэтому там представление отвечает 501, а EventSource в браузере
+    после такого ответа не переподключается.
+    """
+
+    async def get(self, request, pk):
+        if not settings.NEWS_EVENTS_ENABLED:
+            raise Http404
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(
+                'Поток комментариев доступен только через ASGI.', status=501
+            )
+        if not await News.objects.filter(pk=pk).aexists():
+            raise Http404
+        response = StreamingHttpResponse(
+            comment_events(pk, request.headers.get('Last-Event-ID')),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class UserNavFragment(UserFragmentMixin, generic.TemplateView):
+    """Фрагмент шапки с данными пользователя."""
+    template_name = 'includes/user_nav.html'
+
+
+class CommentFormFragment(UserFragmentMixin, generic.TemplateView):
+    """Фрагмент с формой комментария для авторизованного пользователя."""
+    template_name = 'news/includes/comment_form.html'
+
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return HttpResponse()
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['form'] = CommentForm()
+        context['news_pk'] = self.kwargs['pk']
         return context
 
 
@@ -55,11 +211,16 @@ class NewsComment(
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        # Форма с ошибками показывается на странице новости с комментариями.
+        prefetch_related_objects([self.object], 'comment_set__author')
+        return super().get_context_data(**kwargs)
+
     def form_valid(self, form):
-        comment = form.save(commit=False)
-        comment.news = self.object
-        comment.author = self.request.user
-        comment.save()
+        writer.submit(
+            services.add_comment,
+            self.object, self.request.user, form.save(commit=False)
+        )
         return super().form_valid(form)
 
     def get_success_url(self):
@@ -98,7 +259,16 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def form_valid(self, form):
+        self.object = writer.submit(form.save)
+        return HttpResponseRedirect(self.get_success_url())
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def form_valid(self, form):
+        success_url = self.get_success_url()
+        writer.submit(services.delete_comment, self.object)
+        return HttpResponseRedirect(success_url)
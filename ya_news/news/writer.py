@@ -0,0 +1,122 @@
+"""
+Очередь записи в БД.
+
+SQLite допускает одного пишущего: при нескольких потоках и процессах,
+которые пишут одновременно, запросы ждут блокировку и падают с
+«database is locked». Если включён WRITE_QUEUE_ENABLED, изменения
+передаются одному потоку записи процесса. Он забирает из очереди всё
+накопившееся (до WRITE_QUEUE_BATCH заданий) и выполняет одной
+транзакцией — групповой фиксацией; каждое задание идёт в своей точке
+сохранения, поэтому ошибка одного не откатывает остальные. Запрос
+ждёт результат своего задания, как при обычной записи.
+
+Поток один на процесс: при нескольких процессах за блокировку SQLite
+соперничают только их потоки записи.
+"""
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class WriteQueueBusy(Exception):
+    """Задание не удалось поставить или выполнить вовремя."""
+
+
+class Writer:
+    """Поток записи с групповой фиксацией."""
+
+    def __init__(self):
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        # После fork поток записи в дочернем процессе не существует.
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(settings.WRITE_QUEUE_SIZE)
+            self._pid = os.getpid()
+            threading.Thread(
+                target=self._run, args=(self._queue,),
+                name='db-writer', daemon=True
+            ).start()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Выполняет func(*args, **kwargs) в потоке записи и возвращает
+        результат или пробрасывает исключение.
+
+        Если задание не начало выполняться за WRITE_QUEUE_TIMEOUT секунд,
+        оно отменяется и выбрасывается WriteQueueBusy.
+        """
+        if not settings.WRITE_QUEUE_ENABLED:
+            return func(*args, **kwargs)
+        self._ensure_started()
+        future = Future()
+        try:
+            self._queue.put(
+                (future, func, args, kwargs),
+                timeout=settings.WRITE_QUEUE_TIMEOUT
+            )
+        except queue.Full:
+            raise WriteQueueBusy('Очередь записи переполнена')
+        try:
+            return future.result(timeout=settings.WRITE_QUEUE_TIMEOUT)
+        except TimeoutError:
+            if future.cancel():
+                raise WriteQueueBusy('Запись не дождалась очереди')
+        # Задание уже выполняется: дожидаемся фиксации транзакции.
+        return future.result()
+
+    def _run(self, jobs):
+        while True:
+            batch = [jobs.get()]
+            while len(batch) < settings.WRITE_QUEUE_BATCH:
+                try:
+                    batch.append(jobs.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        results = []
+        committed = []
+        try:
+            with transaction.atomic():
+                # Выполняется первым после фиксации: по нему видно, что
+                # данные записаны, даже если упадёт обработчик on_commit
+                # одного из заданий.
+                transaction.on_commit(lambda: committed.append(True))
+                for future, func, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with transaction.atomic():
+                            results.append((future, func(*args, **kwargs)))
+                    except Exception as error:
+                        future.set_exception(error)
+        except Exception as error:
+            if not committed:
+                for future, _ in results:
+                    future.set_exception(error)
+                connection.close()
+                return
+            logger.exception('Ошибка в обработчике on_commit после записи')
+        for future, result in results:
+            future.set_result(result)
+
+
+writer = Writer()
+
+
+def submit(func, *args, **kwargs):
+    """Выполняет запись через очередь процесса (см. Writer.submit)."""
+    return writer.submit(func, *args, **kwargs)
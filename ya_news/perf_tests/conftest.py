@@ -0,0 +1,38 @@
+"""
+Фикстуры микробенчмарков news.
+
+Замеры и базовые значения — в baselines.py.
+"""
+import pytest
+from django.conf import settings
+from django.test import Client
+
+from baselines import from_environment
+from news.factories import make_comments, make_news, make_user
+
+
+@pytest.fixture(scope='session')
+def baselines():
+    baselines = from_environment()
+    yield baselines
+    baselines.save()
+
+
+@pytest.fixture
+def author():
+    return make_user('author')
+
+
+@pytest.fixture
+def author_client(author):
+    client = Client()
+    client.force_login(author)
+    return client
+
+
+@pytest.fixture
+def seeded_news(author):
+    """Главная с полным списком новостей и новость с комментариями."""
+    news = make_news(settings.NEWS_COUNT_ON_HOME_PAGE + 5)
+    make_comments(news[0], author, 100)
+    return news[0]
@@ -0,0 +1,41 @@
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from news.forms import CommentForm
+
+pytestmark = pytest.mark.django_db
+
+
+class TestPerformance:
+    """Время критичных путей не хуже базового."""
+
+    def test_comment_form_clean_text(self, baselines):
+        form = CommentForm()
+        form.cleaned_data = {'text': 'Длинный вежливый комментарий. ' * 50}
+        baselines.check('CommentForm.clean_text', form.clean_text)
+
+    def test_news_list_render(self, baselines, seeded_news):
+        client = Client()
+        url = reverse('news:home')
+        assert client.get(url).status_code == 200
+        baselines.check('NewsList', lambda: client.get(url))
+
+    def test_news_detail_render(self, baselines, seeded_news):
+        client = Client()
+        url = reverse('news:detail', args=[seeded_news.pk])
+        assert client.get(url).status_code == 200
+        baselines.check('NewsDetail', lambda: client.get(url))
+
+    def test_comment_post(
+        self,
+        settings,
+        baselines,
+        seeded_news,
+        author_client
+    ):
+        settings.RATE_LIMITS = {}
+        url = reverse('news:detail', args=[seeded_news.pk])
+        data = {'text': 'Комментарий'}
+        assert author_client.post(url, data).status_code == 302
+        baselines.check('comment post', lambda: author_client.post(url, data))
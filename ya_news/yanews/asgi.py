@@ -2,6 +2,10 @@
 ASGI config for yanews project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Streams of new comments are served by ``news.streams`` directly, bypassing
+the synchronous middleware stack, and collected static files by
+``yanews.static``. With WARMUP_ON_START the process is warmed up by
+``yanews.warmup`` before serving requests.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -13,4 +17,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from news.streams import with_comment_streams  # noqa: E402
+from yanews import warmup  # noqa: E402
+from yanews.static import asgi_static_files  # noqa: E402
+
+application = asgi_static_files(with_comment_streams(django_application))
+
+if settings.WARMUP_ON_START:
+    warmup.run_in_thread()
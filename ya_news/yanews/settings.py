@@ -1,3 +1,4 @@
+import tempfile
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,6 +22,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'news.compression.CompressionMiddleware',
+    'yanews.middleware.ConcurrencyLimitMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -28,6 +31,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # После SecurityMiddleware и XFrameOptionsMiddleware: готовые страницы
+    # получают те же заголовки безопасности, что и страницы Django.
+    'news.middleware.PrerenderedPageMiddleware',
+    'yanews.middleware.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'yanews.urls'
@@ -43,6 +50,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'news.context_processors.cacheable_pages',
             ],
         },
     },
@@ -59,6 +67,16 @@ DATABASES = {
 }
 
 
+# Кеш должен быть общим для всех процессов: в нём хранятся рейтинг
+# обсуждаемых новостей и другие общие структуры. LocMemCache подходит
+# для одного процесса, для нескольких — FileBasedCache или Redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 AUTH_PASSWORD_VALIDATORS = []
 
 
@@ -73,6 +91,18 @@ USE_L10N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
+STATICFILES_DIRS = [BASE_DIR / 'static_dev']
+# Сюда collectstatic собирает файлы с хешами в именах и их сжатые копии;
+# их отдаёт yanews.static.
+STATIC_ROOT = BASE_DIR / 'static'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'yanews.static.CompressedManifestStaticFilesStorage',
+    },
+}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -80,3 +110,100 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+# Режим кешируемых страниц: главная и страница новости одинаковы для всех
+# пользователей, а шапка и форма комментария подгружаются фрагментами.
+NEWS_CACHEABLE_PAGES = False
+NEWS_PAGE_MAX_AGE = 60
+NEWS_FRAGMENT_MAX_AGE = 0
+
+# Поток новых комментариев (Server-Sent Events), работает через ASGI.
+NEWS_EVENTS_ENABLED = False
+NEWS_EVENTS_HEARTBEAT = 15
+NEWS_EVENTS_QUEUE_SIZE = 100
+# Каталог UNIX-сокетов для рассылки событий между процессами.
+# None — события доставляются только внутри одного процесса.
+NEWS_EVENTS_SOCKET_DIR = None
+
+# Как часто процесс сбрасывает накопленные просмотры новостей в БД, секунд.
+# Это же — максимальное окно потери просмотров при падении процесса.
+# 0 — сбрасывать сразу при каждом просмотре.
+NEWS_VIEWS_FLUSH_INTERVAL = 10
+
+# Рейтинг обсуждаемых новостей: период полураспада веса комментария
+# в секундах и число новостей, которые хранит рейтинг.
+NEWS_TRENDING_HALF_LIFE = 6 * 60 * 60
+NEWS_TRENDING_CAPACITY = 100
+
+# Кеш страниц с защитой от лавины промахов (news.caching): время жизни
+# записи, сколько ещё можно отдавать устаревшую копию, пока страницу
+# пересчитывает другой обработчик, и сколько ждать, если копии нет.
+# Общие страницы кешируются только в режиме NEWS_CACHEABLE_PAGES.
+# 0 в PAGE_CACHE_TIMEOUT выключает кеш.
+PAGE_CACHE_TIMEOUT = 0
+PAGE_CACHE_STALE_TIMEOUT = 60
+PAGE_CACHE_WAIT = 2.0
+PAGE_CACHE_LOCK_DIR = Path(tempfile.gettempdir()) / 'yanews-page-locks'
+
+# Адаптивные лимиты одновременных запросов на процесс: отдельно для
+# чтения и для записи. Сверх лимита — ответ 503 с Retry-After (секунд).
+CONCURRENCY_LIMITS = {
+    'read': {
+        'initial': 20, 'minimum': 4, 'maximum': 100, 'target_latency': 0.5,
+    },
+    'write': {
+        'initial': 4, 'minimum': 1, 'maximum': 16, 'target_latency': 0.5,
+    },
+}
+CONCURRENCY_RETRY_AFTER = 1
+
+# Частота записи по именам маршрутов: корзины токенов на сессию и на
+# IP-адрес (burst — запас запросов подряд, per_minute — пополнение).
+# Состояние хранится в кеше default, поэтому для нескольких процессов
+# он должен быть общим. За прокси REMOTE_ADDR нужно восстанавливать
+# из заголовка, иначе все клиенты попадут в одну корзину по IP.
+RATE_LIMITS = {
+    'news:detail': {
+        'user': {'burst': 5, 'per_minute': 10},
+        'ip': {'burst': 30, 'per_minute': 60},
+    },
+    'news:edit': {
+        'user': {'burst': 5, 'per_minute': 10},
+        'ip': {'burst': 30, 'per_minute': 60},
+    },
+}
+
+# Очередь записи (news.writer): изменения выполняет один поток процесса
+# с групповой фиксацией до WRITE_QUEUE_BATCH заданий. Запрос ждёт начала
+# своего задания не дольше WRITE_QUEUE_TIMEOUT секунд, иначе — 503.
+WRITE_QUEUE_ENABLED = False
+WRITE_QUEUE_SIZE = 1000
+WRITE_QUEUE_BATCH = 100
+WRITE_QUEUE_TIMEOUT = 5
+
+# Каталог заранее отрисованных страниц для анонимных читателей
+# (news.prerender). None — страницы не пишутся и не отдаются.
+PRERENDER_ROOT = None
+
+# Сжатие ответов (news.compression): ответы меньше COMPRESSION_MIN_SIZE
+# байт не сжимаются — выигрыш меньше затрат.
+COMPRESSION_MIN_SIZE = 1024
+
+# Сессии и пользователи сессий читаются из кеша, БД — при промахе.
+# Сессии пишутся и в кеш, и в БД. С LocMemCache у каждого процесса свой
+# кеш, и изменение пользователя другие процессы увидят только через
+# AUTH_USER_CACHE_TIMEOUT секунд; в продакшене нужен общий кеш (Redis).
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = ['news.backends.CachedModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Пароли при входе и регистрации хешируются в пуле потоков
+# (yanews.views). Сверх PASSWORD_HASHING_QUEUE ожидающих заданий вход
+# и регистрация получают 503, не занимая обработчики запросов.
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_QUEUE = 8
+
+# Прогрев процесса (yanews.warmup) при загрузке yanews.wsgi и yanews.asgi:
+# маршруты, шаблоны, переводы, соединения с БД и запросы к WARMUP_URLS.
+WARMUP_ON_START = False
+WARMUP_URLS = [reverse_lazy('news:home')]
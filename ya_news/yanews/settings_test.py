@@ -0,0 +1,15 @@
+"""Настройки для тестов: быстрый хешер паролей, просмотры без потока."""
+from django.conf import global_settings
+
+from .settings import *  # noqa: F401, F403
+
+# PBKDF2 намеренно медленный; в тестах пароли не нужно защищать.
+# Остальные хешеры нужны, чтобы проверять уже сохранённые хеши.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+    *global_settings.PASSWORD_HASHERS,
+]
+
+# Просмотры пишутся сразу: фоновый поток сброса писал бы в тестовую БД
+# из другого потока.
+NEWS_VIEWS_FLUSH_INTERVAL = 0
@@ -1,8 +1,17 @@
 from django.contrib import admin
 from django.contrib.auth import views as auth_views
-from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
-from django.views.generic import CreateView
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.debug import sensitive_post_parameters
+
+from .views import LoginView, SignupView
+
+
+def password_view(view):
+    """Обёртки, как у представлений django.contrib.auth."""
+    return sensitive_post_parameters()(csrf_protect(never_cache(view)))
+
 
 urlpatterns = [
     path('', include('news.urls')),
@@ -12,7 +21,7 @@ urlpatterns = [
 auth_urls = ([
     path(
         'login/',
-        auth_views.LoginView.as_view(),
+        password_view(LoginView.as_view()),
         name='login',
     ),
     path(
@@ -24,11 +33,7 @@ auth_urls = ([
     ),
     path(
         'signup/',
-        CreateView.as_view(
-            form_class=UserCreationForm,
-            success_url='/',
-            template_name='registration/signup.html',
-        ),
+        password_view(SignupView.as_view()),
         name='signup'
     ),
 ], 'users')
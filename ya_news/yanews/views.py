@@ -0,0 +1,160 @@
+"""
+Вход и регистрация с хешированием паролей в отдельном пуле потоков.
+
+Проверка и создание пароля (PBKDF2) занимают процессор на десятки
+миллисекунд. Асинхронные LoginView и SignupView отдают эту работу пулу
+из PASSWORD_HASHING_WORKERS потоков и не держат обработчик запросов.
+Одновременно в пуле и в очереди к нему бывает не больше
+PASSWORD_HASHING_WORKERS + PASSWORD_HASHING_QUEUE заданий; сверх этого
+вход и регистрация сразу получают 503, а чтение страниц не страдает.
+
+Хеш, созданный со старыми параметрами, Django обновляет при успешной
+проверке пароля. Это происходит в том же задании пула и до входа: хеш
+входит в подпись сессии, и обновление после входа разлогинило бы
+пользователя.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import alogin
+from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
+from django.db import close_old_connections
+from django.http import HttpResponseRedirect
+from django.shortcuts import resolve_url
+from django.template.response import TemplateResponse
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views import generic
+
+from .middleware import overloaded
+
+
+class PasswordHashingBusy(Exception):
+    """Пул хеширования паролей и очередь к нему заполнены."""
+
+
+class HashingPool:
+    """Пул потоков для хеширования паролей с ограниченной очередью."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.slots = None
+
+    def _ensure_started(self):
+        with self.lock:
+            if self.executor is None:
+                workers = settings.PASSWORD_HASHING_WORKERS
+                self.slots = threading.BoundedSemaphore(
+                    workers + settings.PASSWORD_HASHING_QUEUE
+                )
+                self.executor = ThreadPoolExecutor(
+                    workers, thread_name_prefix='password-hashing'
+                )
+
+    async def run(self, func, *args):
+        """Выполняет func в пуле или сразу бросает PasswordHashingBusy."""
+        self._ensure_started()
+        if not self.slots.acquire(blocking=False):
+            raise PasswordHashingBusy('Пул хеширования паролей занят')
+        try:
+            return await sync_to_async(
+                self._call, thread_sensitive=False, executor=self.executor
+            )(func, *args)
+        finally:
+            self.slots.release()
+
+    @staticmethod
+    def _call(func, *args):
+        try:
+            return func(*args)
+        finally:
+            # Потоки пула живут долго: соединения с БД закрываются
+            # по CONN_MAX_AGE, как после обычного запроса.
+            close_old_connections()
+
+
+hashing_pool = HashingPool()
+
+
+class PasswordFormView(generic.View):
+    """
+    Асинхронное представление формы, проверяемой в пуле хеширования.
+
+    По умолчанию форма только проверяется, а после успеха браузер
+    перенаправляется на success_url.
+    """
+
+    form_class = None
+    template_name = None
+    success_url = '/'
+
+    def get_form(self, data=None):
+        return self.form_class(data=data)
+
+    def render(self, form):
+        return TemplateResponse(
+            self.request, self.template_name, {'form': form}
+        )
+
+    async def get(self, request, *args, **kwargs):
+        return self.render(self.get_form())
+
+    async def post(self, request, *args, **kwargs):
+        form = self.get_form(request.POST)
+        try:
+            result = await hashing_pool.run(self.process, form)
+        except PasswordHashingBusy:
+            return overloaded()
+        if result is None:
+            return self.render(form)
+        return await self.form_valid(form, result)
+
+    def process(self, form):
+        """Проверяет форму в потоке пула; None — форма с ошибками."""
+        return form if form.is_valid() else None
+
+    def get_success_url(self):
+        return resolve_url(self.success_url)
+
+    async def form_valid(self, form, result):
+        """Вызывается в цикле событий с результатом process()."""
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class LoginView(PasswordFormView):
+    """Вход: пароль проверяется в пуле, сессия создаётся асинхронно."""
+
+    form_class = AuthenticationForm
+    template_name = 'registration/login.html'
+
+    def get_form(self, data=None):
+        return self.form_class(self.request, data=data)
+
+    def process(self, form):
+        return form.get_user() if form.is_valid() else None
+
+    def get_success_url(self):
+        url = self.request.POST.get('next', self.request.GET.get('next'))
+        if url and url_has_allowed_host_and_scheme(
+            url,
+            allowed_hosts={self.request.get_host()},
+            require_https=self.request.is_secure(),
+        ):
+            return url
+        return resolve_url(settings.LOGIN_REDIRECT_URL)
+
+    async def form_valid(self, form, user):
+        await alogin(self.request, user)
+        return await super().form_valid(form, user)
+
+
+class SignupView(PasswordFormView):
+    """Регистрация: пароль хешируется в пуле."""
+
+    form_class = UserCreationForm
+    template_name = 'registration/signup.html'
+
+    def process(self, form):
+        return form.save() if form.is_valid() else None
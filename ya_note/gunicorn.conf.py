@@ -0,0 +1,28 @@
+"""
+Настройки gunicorn: gunicorn -c gunicorn.conf.py
+
+Приложение загружается и прогревается (yanote.warmup) в главном процессе
+до fork, поэтому рабочие процессы стартуют с готовыми маршрутами,
+шаблонами и переводами и делят эту память с главным. WARMUP_ON_START
+при таком запуске не нужен.
+"""
+import multiprocessing
+
+wsgi_app = 'yanote.wsgi:application'
+bind = '127.0.0.1:8000'
+workers = multiprocessing.cpu_count() * 2 + 1
+preload_app = True
+
+
+def when_ready(server):
+    from yanote import warmup
+
+    warmup.run()
+    # Соединения с БД нельзя делить между процессами после fork.
+    warmup.close_connections()
+
+
+def post_fork(server, worker):
+    from yanote import warmup
+
+    warmup.open_connections()
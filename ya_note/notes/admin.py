@@ -1,5 +1,40 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
 
+from . import deletion
 from .models import Note
 
+User = get_user_model()
+
 admin.site.register(Note)
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class ChunkedDeleteUserAdmin(UserAdmin):
+    """
+    Удаление пользователей через notes.deletion вместо сборщика Django.
+
+    Страница подтверждения показывает удаляемых пользователей и число
+    заметок, не загружая сами заметки.
+    """
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, User.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        deletion.delete_users(queryset)
+
+    def get_deleted_objects(self, objs, request):
+        pks = [obj.pk for obj in objs]
+        notes = Note.objects.filter(author__in=pks).count()
+        model_count = {User._meta.verbose_name_plural: len(pks)}
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(User._meta.verbose_name)
+        if notes:
+            model_count[Note._meta.verbose_name_plural] = notes
+            if not request.user.has_perm('notes.delete_note'):
+                perms_needed.add(Note._meta.verbose_name)
+        return [str(obj) for obj in objs], model_count, perms_needed, []
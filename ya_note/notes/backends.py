@@ -0,0 +1,34 @@
+"""
+Бэкенд аутентификации с кешем пользователей.
+
+AuthenticationMiddleware на каждом запросе загружает пользователя
+по id из сессии. CachedModelBackend берёт его из кеша и обращается к БД
+только при промахе. Запись из кеша удаляется, когда пользователь
+сохраняется (в том числе при смене пароля и входе), удаляется
+или выходит; изменения через QuerySet.update() кеш не видит.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_key(user_id):
+    return f'auth.user.{user_id}'
+
+
+def forget_user(user_id):
+    """Удаляет пользователя из кеша."""
+    cache.delete(user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который ищет пользователя сессии сначала в кеше."""
+
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,198 @@
+"""
+Кеш страниц с защитой от лавины промахов.
+
+Когда запись в кеше устарела или отсутствует, страницу пересчитывает
+только один обработчик — тот, кто взял файловую блокировку на её ключ.
+Остальные в это время получают устаревшую копию (stale-while-revalidate),
+а если копии нет — недолго ждут, пока блокировка освободится.
+Файловые блокировки работают между процессами одного сервера.
+В кеше хранится уже сжатое тело: вариант gzip и вариант без сжатия
+кешируются под разными ключами.
+
+Запись хранит свои ETag и Last-Modified: condition() ставит валидаторы
+только ответу без них, и устаревшая копия не должна получить валидаторы
+текущей версии страницы — иначе клиент перепроверял бы её с ответом 304.
+"""
+import datetime
+import time
+import zlib
+from functools import wraps
+from hashlib import md5
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from . import compression
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировки только внутри процесса.
+    fcntl = None
+
+_POLL_INTERVAL = 0.01
+# Ключ блокируется через один из LOCK_FILES файлов, выбранный по хешу
+# ключа: число файлов не растёт с числом страниц и пользователей. Ключи
+# с общим файлом изредка пересчитываются по очереди.
+LOCK_FILES = 256
+
+
+class KeyLock:
+    """Неблокирующая файловая блокировка на ключ кеша."""
+
+    def __init__(self, key):
+        directory = Path(settings.PAGE_CACHE_LOCK_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        slot = zlib.crc32(key.encode()) % LOCK_FILES
+        self.path = directory / f'{slot}.lock'
+        self.file = None
+
+    def acquire(self, timeout=0):
+        deadline = time.monotonic() + timeout
+        self.file = open(self.path, 'a')
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    self.file.close()
+                    self.file = None
+                    return False
+                time.sleep(_POLL_INTERVAL)
+
+    def release(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def page_key(url, variant):
+    """Ключ кеша для варианта страницы по адресу."""
+    digest = md5(f'{url}|{variant}'.encode(), usedforsecurity=False)
+    return f'page.{digest.hexdigest()}'
+
+
+def _fresh(entry, version):
+    return (
+        entry is not None
+        and entry['version'] == version
+        and entry['expires'] > time.time()
+    )
+
+
+def _validators(etag, last_modified):
+    """Заголовки ETag и Last-Modified в том виде, как их ставит condition()."""
+    headers = {}
+    if etag is not None:
+        headers['ETag'] = quote_etag(etag)
+    if last_modified is not None:
+        if not timezone.is_aware(last_modified):
+            last_modified = timezone.make_aware(
+                last_modified, datetime.timezone.utc
+            )
+        headers['Last-Modified'] = http_date(int(last_modified.timestamp()))
+    return headers
+
+
+def _from_entry(entry, version):
+    response = HttpResponse(
+        entry['content'], status=entry['status'], headers=entry['headers']
+    )
+    if not _fresh(entry, version):
+        # Устаревшую копию клиент перепроверяет при следующем запросе.
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _store(key, version, validators, response):
+    if hasattr(response, 'render'):
+        response.render()
+    if (
+        response.status_code != 200
+        or response.streaming
+        or response.cookies
+    ):
+        return
+    cache.set(
+        key,
+        {
+            'version': version,
+            'expires': time.time() + settings.PAGE_CACHE_TIMEOUT,
+            'content': response.content,
+            'status': response.status_code,
+            'headers': {**dict(response.items()), **validators},
+        },
+        settings.PAGE_CACHE_TIMEOUT + settings.PAGE_CACHE_STALE_TIMEOUT,
+    )
+
+
+def _cached_view(view, key, version, validators, request, *args, **kwargs):
+    entry = cache.get(key)
+    if _fresh(entry, version):
+        return _from_entry(entry, version)
+    lock = KeyLock(key)
+    if lock.acquire():
+        try:
+            entry = cache.get(key)
+            if _fresh(entry, version):
+                return _from_entry(entry, version)
+            response = view(request, *args, **kwargs)
+            compression.prepare(request, response)
+            _store(key, version, validators, response)
+            return response
+        finally:
+            lock.release()
+    if entry is not None:
+        return _from_entry(entry, version)
+    # Копии нет: ждём, пока страницу посчитает другой обработчик.
+    if lock.acquire(timeout=settings.PAGE_CACHE_WAIT):
+        lock.release()
+        entry = cache.get(key)
+        if entry is not None:
+            return _from_entry(entry, version)
+    return view(request, *args, **kwargs)
+
+
+def single_flight_cache(
+    variant_func, version_func=None, last_modified_func=None
+):
+    """
+    Кеширует ответы GET-представления.
+
+    variant_func(request) возвращает строку, различающую варианты
+    страницы (например, для разных пользователей), или None, если ответ
+    кешировать нельзя. version_func(request, *args, **kwargs) — дешёвый
+    валидатор: запись с другой версией считается устаревшей. version_func
+    и last_modified_func должны совпадать с etag_func и last_modified_func
+    внешнего condition(): их значения сохраняются вместе с записью.
+    Кеш выключен, пока PAGE_CACHE_TIMEOUT равен нулю.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            variant = variant_func(request)
+            if not settings.PAGE_CACHE_TIMEOUT or variant is None:
+                return view(request, *args, **kwargs)
+            version = (
+                version_func(request, *args, **kwargs)
+                if version_func else None
+            )
+            last_modified = (
+                last_modified_func(request, *args, **kwargs)
+                if last_modified_func else None
+            )
+            if compression.accepts_gzip(request):
+                variant = f'{variant}|gzip'
+            key = page_key(request.build_absolute_uri(), variant)
+            return _cached_view(
+                view, key, version, _validators(version, last_modified),
+                request, *args, **kwargs
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,61 @@
+"""
+Валидаторы для условных GET-запросов.
+
+Версия списка заметок — число заметок пользователя и время последнего
+изменения. Её подсчёт дешевле основной выборки и отрисовки шаблона,
+поэтому на актуальный If-None-Match клиент сразу получает ответ 304.
+
+У списка нет Last-Modified: после удаления самой свежей заметки время
+последнего изменения ушло бы назад. ETag учитывает число заметок.
+"""
+from functools import wraps
+from hashlib import md5
+
+from django.db.models import Count, Max
+
+from .models import Note
+
+
+def _state_per_request(func):
+    """Считаем состояние страницы один раз для ETag и Last-Modified."""
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        attr = f'_{func.__name__}'
+        if not hasattr(request, attr):
+            setattr(request, attr, func(request, *args, **kwargs))
+        return getattr(request, attr)
+    return wrapper
+
+
+def _make_etag(*parts):
+    return md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+@_state_per_request
+def _notes_list_state(request, *args, **kwargs):
+    notes = Note.objects.filter(author=request.user).aggregate(
+        count=Count('id'), updated=Max('updated')
+    )
+    return _make_etag(request.user.pk, notes['count'], notes['updated'])
+
+
+@_state_per_request
+def _note_detail_state(request, slug, *args, **kwargs):
+    updated = Note.objects.filter(
+        author=request.user, slug=slug
+    ).values_list('updated', flat=True).first()
+    if updated is None:
+        return None, None
+    return _make_etag(request.user.pk, slug, updated), updated
+
+
+def notes_list_etag(request, *args, **kwargs):
+    return _notes_list_state(request, *args, **kwargs)
+
+
+def note_detail_etag(request, *args, **kwargs):
+    return _note_detail_state(request, *args, **kwargs)[0]
+
+
+def note_detail_last_modified(request, *args, **kwargs):
+    return _note_detail_state(request, *args, **kwargs)[1]
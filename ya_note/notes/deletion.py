@@ -0,0 +1,60 @@
+"""
+Удаление больших объёмов данных порциями.
+
+Обычное удаление пользователя собирает в Python все его заметки и
+удаляет их одной долгой транзакцией, на всё это время блокируя запись
+в SQLite. Здесь заметки удаляются обычным delete() по chunk_size строк,
+каждая порция — отдельная короткая транзакция.
+"""
+import time
+
+from django.db import transaction
+
+from .models import Note
+
+CHUNK_SIZE = 500
+
+
+def _delete_chunked(queryset, chunk_size, pause):
+    """Удаляет строки выборки порциями."""
+    queryset = queryset.order_by('pk')
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            deleted += queryset.model._base_manager.filter(
+                pk__in=pks
+            ).delete()[1].get(queryset.model._meta.label, 0)
+        if pause:
+            time.sleep(pause)
+
+
+def delete_notes(queryset, chunk_size=CHUNK_SIZE, pause=0):
+    """Удаляет заметки выборки и возвращает их число."""
+    return _delete_chunked(queryset, chunk_size, pause)
+
+
+def delete_users(queryset, chunk_size=CHUNK_SIZE, pause=0):
+    """
+    Удаляет пользователей вместе с их заметками.
+
+    Возвращает число удалённых пользователей и заметок. Самих
+    пользователей удаляет обычный delete(): к ним привязаны ещё записи
+    журнала админки и группы, но после удаления заметок сборщику
+    остаётся немного.
+    """
+    notes = delete_notes(
+        Note.objects.filter(author__in=queryset.values('pk')),
+        chunk_size, pause
+    )
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    users = 0
+    for start in range(0, len(pks), chunk_size):
+        users += queryset.model.objects.filter(
+            pk__in=pks[start:start + chunk_size]
+        ).delete()[1].get(queryset.model._meta.label, 0)
+        if pause:
+            time.sleep(pause)
+    return users, notes
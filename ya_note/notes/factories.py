@@ -0,0 +1,62 @@
+"""
+Быстрое создание данных для тестов.
+
+Объекты каждого вида вставляются одним bulk_create. Пароль хешируется
+один раз на всех пользователей; в тестовом профиле yanote.settings_test
+хешер быстрый (MD5). bulk_create не вызывает save(), поэтому slug
+заметки задаётся явно.
+"""
+from functools import lru_cache
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import Client
+
+from .models import Note
+
+User = get_user_model()
+
+PASSWORD = 'password123'
+
+
+@lru_cache
+def _password_hash(password):
+    return make_password(password)
+
+
+def make_users(*usernames, password=PASSWORD):
+    """Пользователи с общим паролем; None — вход по паролю невозможен."""
+    return User.objects.bulk_create(
+        User(username=username, password=_password_hash(password))
+        for username in usernames
+    )
+
+
+def make_user(username, password=PASSWORD):
+    return make_users(username, password=password)[0]
+
+
+def make_notes(
+    author,
+    count=1,
+    title='Заметка {i}',
+    text='Текст заметки {i}',
+    slug='note-{i}',
+):
+    """Заметки автора; в title, text и slug подставляется номер i."""
+    return Note.objects.bulk_create(
+        Note(
+            title=title.format(i=i),
+            text=text.format(i=i),
+            slug=slug.format(i=i),
+            author=author,
+        )
+        for i in range(count)
+    )
+
+
+def logged_in_client(user):
+    """Клиент, вошедший как user, без проверки пароля."""
+    client = Client()
+    client.force_login(user)
+    return client
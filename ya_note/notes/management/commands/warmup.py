@@ -0,0 +1,85 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from yanote import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает процесс (yanote.warmup). С --compare сравнивает '
+        'время первого запроса в новых процессах без прогрева и с ним.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--compare', action='store_true')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--url', action='append', dest='urls',
+            help='Адрес первого запроса; по умолчанию WARMUP_URLS.',
+        )
+        # Режимы дочернего процесса для --compare.
+        parser.add_argument('--probe', choices=('cold', 'warm'))
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or [str(url) for url in settings.WARMUP_URLS]
+        if options['probe']:
+            self.probe(options['probe'] == 'warm', urls)
+        elif options['compare']:
+            self.compare(urls, options['repeat'])
+        else:
+            for title, count, seconds in warmup.run():
+                self.stdout.write(
+                    f'{title}: {count} за {seconds * 1000:.0f} мс'
+                )
+
+    def probe(self, warm, urls):
+        """Печатает время прогрева и первого и второго запроса, мс."""
+        started = time.perf_counter()
+        if warm:
+            warmup.run()
+        result = {'warmup': time.perf_counter() - started}
+        client = Client(HTTP_HOST='localhost')
+        for label in ('first', 'second'):
+            started = time.perf_counter()
+            for url in urls:
+                client.get(url)
+            result[label] = time.perf_counter() - started
+        self.stdout.write(json.dumps(result))
+
+    def run_probe(self, mode, urls):
+        command = [
+            sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'),
+            'warmup', '--probe', mode,
+        ]
+        for url in urls:
+            command += ['--url', url]
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        output = subprocess.run(
+            command, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def compare(self, urls, repeat):
+        for mode in ('cold', 'warm'):
+            runs = [self.run_probe(mode, urls) for _ in range(repeat)]
+            median = {
+                key: statistics.median(run[key] for run in runs) * 1000
+                for key in runs[0]
+            }
+            self.stdout.write(
+                f'{mode}: первый запрос {median["first"]:.1f} мс, '
+                f'второй {median["second"]:.1f} мс'
+                + (
+                    f', прогрев {median["warmup"]:.0f} мс'
+                    if mode == 'warm' else ''
+                )
+            )
@@ -27,6 +27,7 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated = models.DateTimeField('Изменено', auto_now=True)
 
     def __str__(self):
         return self.title
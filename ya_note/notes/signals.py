@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import forget_user
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_changed_user(sender, instance, **kwargs):
+    """Удаляет изменённого пользователя из кеша аутентификации."""
+    # Удаляем сразу и после фиксации: до неё другой запрос мог снова
+    # положить в кеш старую строку. pk запоминается, потому что после
+    # удаления он обнуляется раньше, чем сработает on_commit.
+    pk = instance.pk
+    forget_user(pk)
+    transaction.on_commit(lambda: forget_user(pk))
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    """Удаляет вышедшего пользователя из кеша аутентификации."""
+    if user is not None:
+        forget_user(user.pk)
@@ -1,7 +1,14 @@
+import gzip
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.template import Template
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from django.views import generic
 
+from notes.checks import check_n_plus_one, find_n_plus_one
+from notes.factories import logged_in_client, make_users
 from notes.models import Note
 from notes.forms import NoteForm
 
@@ -14,14 +21,7 @@ class TestContent(TestCase):
     @classmethod
     def setUpTestData(cls):
         """Создаем тестовые данные."""
-        cls.author = User.objects.create_user(
-            username='author',
-            password='password123'
-        )
-        cls.reader = User.objects.create_user(
-            username='reader',
-            password='password123'
-        )
+        cls.author, cls.reader = make_users('author', 'reader')
 
         # Создаем заметки для автора
         cls.note1 = Note.objects.create(
@@ -45,8 +45,7 @@ class TestContent(TestCase):
             author=cls.reader
         )
 
-        cls.author_client = Client()
-        cls.author_client.force_login(cls.author)
+        cls.author_client = logged_in_client(cls.author)
 
     def test_note_in_list_context(self):
         """Отдельная заметка передается в object_list контекста."""
@@ -95,3 +94,84 @@ class TestContent(TestCase):
         # Проверяем, что форма редактирования содержит данные заметки
         form = response.context['form']
         self.assertEqual(form.instance, self.note1)
+
+    def test_notes_list_conditional_get(self):
+        """Список заметок отдаёт 304, пока заметки не изменились."""
+        url = reverse('notes:list')
+        etag = self.author_client.get(url)['ETag']
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.note1.text = 'Изменённый текст'
+        self.note1.save()
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        # Удаление самой свежей заметки тоже меняет версию списка.
+        self.assertFalse(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        self.note1.delete()
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_notes_list_page_cache(self):
+        """Список заметок берётся из кеша, пока заметки не изменились."""
+        cache.clear()
+        url = reverse('notes:list')
+        self.author_client.get(reverse('notes:add'))
+        self.assertIsNotNone(self.author_client.get(url).context)
+        self.assertIsNone(self.author_client.get(url).context)
+
+        Note.objects.create(
+            title='Новая заметка', text='Текст', author=self.author
+        )
+        response = self.author_client.get(url)
+        self.assertIsNotNone(response.context)
+        self.assertContains(response, 'Новая заметка')
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_notes_list_cached_compressed(self):
+        """Список заметок кешируется сжатым и без пустых строк."""
+        cache.clear()
+        url = reverse('notes:list')
+        self.author_client.get(reverse('notes:add'))
+        first = self.author_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        cached = self.author_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIsNone(cached.context)
+        self.assertEqual(cached['Content-Encoding'], 'gzip')
+        self.assertEqual(cached.content, first.content)
+        html = gzip.decompress(cached.content).decode()
+        self.assertIn(self.note1.title, html)
+        self.assertNotIn('\n\n', html)
+        self.assertFalse(
+            self.author_client.get(url).has_header('Content-Encoding')
+        )
+
+    def test_stylesheet_is_self_hosted(self):
+        """Стили подключаются из своей статики, а не с CDN."""
+        response = Client().get(reverse('notes:home'))
+        self.assertContains(response, '/static/css/bootstrap.min.css')
+        self.assertNotContains(response, 'cdn.jsdelivr.net')
+
+    def test_project_templates_have_no_n_plus_one(self):
+        self.assertEqual(check_n_plus_one(), [])
+
+    def test_n_plus_one_found_in_template_loops(self):
+        """Связи в циклах без select_related считаются N+1."""
+        template = Template(
+            '{% for note in object_list %}\n'
+            '  {{ note.title }}: {{ note.author.username }}\n'
+            '{% endfor %}'
+        )
+
+        class Listing(generic.ListView):
+            model = Note
+
+        class SelectedListing(generic.ListView):
+            queryset = Note.objects.select_related('author')
+
+        self.assertEqual(
+            find_n_plus_one(Listing, template),
+            [('<unknown source>:2', 'author')],
+        )
+        self.assertEqual(find_n_plus_one(SelectedListing, template), [])
@@ -1,8 +1,28 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.http import HttpResponse
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import (
+    TestCase, TransactionTestCase, Client, RequestFactory, override_settings
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from notes.backends import user_key
+from notes.caching import LOCK_FILES, KeyLock, page_key
+from notes.deletion import delete_users
+from notes.factories import (
+    logged_in_client, make_notes, make_user, make_users
+)
 from notes.models import Note
+from notes.writer import submit
+from yanote.middleware import ConcurrencyLimitMiddleware, TokenBucket
 
 User = get_user_model()
 
@@ -13,20 +33,11 @@ class TestLogic(TestCase):
     @classmethod
     def setUpTestData(cls):
         """Создаем тестовые данные."""
-        cls.author = User.objects.create_user(
-            username='author',
-            password='password123'
-        )
-        cls.reader = User.objects.create_user(
-            username='reader',
-            password='password123'
-        )
+        cls.author, cls.reader = make_users('author', 'reader')
 
         cls.client = Client()
-        cls.author_client = Client()
-        cls.author_client.force_login(cls.author)
-        cls.reader_client = Client()
-        cls.reader_client.force_login(cls.reader)
+        cls.author_client = logged_in_client(cls.author)
+        cls.reader_client = logged_in_client(cls.reader)
 
     def test_authenticated_user_can_create_note(self):
         """Залогиненный пользователь может создать заметку."""
@@ -255,3 +266,218 @@ class TestLogic(TestCase):
         self.assertEqual(response.status_code, 404)
         self.assertEqual(notes_count_after, notes_count_before)
         self.assertTrue(Note.objects.filter(slug='others-note').exists())
+
+    def test_writes_shed_when_saturated(self):
+        """Сверх лимита создание заметки сразу получает 503."""
+        middleware = ConcurrencyLimitMiddleware(lambda request: HttpResponse())
+        write_limit = middleware.limits['write']
+        while write_limit.try_acquire():
+            pass
+        response = middleware(RequestFactory().post(reverse('notes:add')))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(
+        RATE_LIMITS={'notes:add': {'ip': {'burst': 1, 'per_minute': 1}}}
+    )
+    def test_note_creation_rate_limited(self):
+        """Сверх запаса токенов создание заметки получает 429."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        notes_count_before = Note.objects.count()
+        for slug in ('first', 'second'):
+            response = self.author_client.post(
+                reverse('notes:add'),
+                {'title': 'Заметка', 'text': 'Текст', 'slug': slug}
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Note.objects.count(), notes_count_before + 1)
+
+    @override_settings(
+        RATE_LIMITS={'notes:add': {'user': {'burst': 1, 'per_minute': 1}}}
+    )
+    def test_rate_limit_survives_new_login(self):
+        """Повторный вход не даёт пользователю новую корзину токенов."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        data = {'title': 'Заметка', 'text': 'Текст', 'slug': 'first'}
+        self.author_client.post(reverse('notes:add'), data)
+        response = logged_in_client(self.author).post(
+            reverse('notes:add'), {**data, 'slug': 'second'}
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_busy_bucket_lock_throttles(self):
+        """Если блокировка корзины занята, запрос ограничивается."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        bucket = TokenBucket('ratelimit.test', burst=1, per_minute=1)
+        cache.add(bucket.key + '.lock', 1)
+        try:
+            with patch('yanote.middleware.BUCKET_LOCK_WAIT', 0.01):
+                self.assertGreater(bucket.take(), 0)
+        finally:
+            cache.delete(bucket.key + '.lock')
+        # Токен не списан.
+        self.assertEqual(bucket.take(), 0)
+        self.assertGreater(bucket.take(), 0)
+
+    def test_page_lock_files_bounded(self):
+        """Файлов блокировок не больше LOCK_FILES при любом числе ключей."""
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(PAGE_CACHE_LOCK_DIR=directory):
+                for user_id in range(LOCK_FILES * 4):
+                    lock = KeyLock(page_key('http://testserver/', user_id))
+                    self.assertTrue(lock.acquire())
+                    lock.release()
+                self.assertLessEqual(
+                    len(list(Path(directory).iterdir())), LOCK_FILES
+                )
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60, PAGE_CACHE_STALE_TIMEOUT=60)
+    def test_stale_page_keeps_own_validators(self):
+        """Устаревшая копия страницы не получает ETag новой версии."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        note = make_notes(self.author, 1)[0]
+        client = logged_in_client(self.author)
+        client.cookies['csrftoken'] = 'a' * 32
+        url = reverse('notes:list')
+        first = client.get(url)
+        self.assertIsNone(client.get(url).context)
+
+        note.title = 'Новый заголовок'
+        note.save()
+        key = page_key(
+            'http://testserver' + url, f'{self.author.pk}:{"a" * 32}'
+        )
+        lock = KeyLock(key)
+        self.assertTrue(lock.acquire())
+        try:
+            stale = client.get(url)
+        finally:
+            lock.release()
+        self.assertEqual(stale.content, first.content)
+        self.assertEqual(stale['ETag'], first['ETag'])
+        self.assertIn('no-cache', stale['Cache-Control'])
+        revalidated = client.get(url, HTTP_IF_NONE_MATCH=stale['ETag'])
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertContains(revalidated, 'Новый заголовок')
+
+    def test_session_and_user_served_from_cache(self):
+        """Сессия и пользователь берутся из кеша до выхода."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        url = reverse('notes:list')
+        client = logged_in_client(self.reader)
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(client.get(url).status_code, 200)
+        auth_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "django_session"' in query['sql']
+            or 'FROM "auth_user"' in query['sql']
+        ]
+        self.assertEqual(auth_queries, [])
+        self.assertIsNotNone(cache.get(user_key(self.reader.pk)))
+
+        client.post(reverse('users:logout'))
+        self.assertIsNone(cache.get(user_key(self.reader.pk)))
+
+    def test_warmup_command(self):
+        """Команда warmup проходит все этапы прогрева."""
+        stdout = StringIO()
+        call_command('warmup', stdout=stdout)
+        for title in ('маршруты', 'шаблоны', 'переводы', 'кеши и страницы'):
+            self.assertIn(title, stdout.getvalue())
+
+    def test_user_deleted_with_notes_in_chunks(self):
+        """Пользователь удаляется вместе со своими заметками порциями."""
+        user = make_user('leaving')
+        make_notes(user, 3, slug='leaving-{i}')
+        notes_count_before = Note.objects.count()
+        self.assertEqual(
+            delete_users(User.objects.filter(pk=user.pk), chunk_size=2),
+            (1, 3)
+        )
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())
+        self.assertEqual(Note.objects.count(), notes_count_before - 3)
+
+
+@override_settings(WRITE_QUEUE_ENABLED=True)
+class TestWriteQueue(TransactionTestCase):
+    """Запись заметок через очередь записи."""
+
+    def setUp(self):
+        self.author = make_user('author')
+        self.author_client = logged_in_client(self.author)
+
+    def test_note_lifecycle_through_queue(self):
+        """Создание, изменение и удаление заметки проходят через очередь."""
+        response = self.author_client.post(
+            reverse('notes:add'),
+            {'title': 'Заметка', 'text': 'Текст', 'slug': 'note'}
+        )
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertEqual(Note.objects.get().author, self.author)
+
+        self.author_client.post(
+            reverse('notes:edit', args=['note']),
+            {'title': 'Заметка', 'text': 'Новый текст', 'slug': 'note'}
+        )
+        self.assertEqual(Note.objects.get().text, 'Новый текст')
+
+        self.author_client.post(reverse('notes:delete', args=['note']))
+        self.assertFalse(Note.objects.exists())
+
+    def test_write_succeeds_when_on_commit_fails(self):
+        """Ошибка обработчика после фиксации не выдаётся за ошибку записи."""
+        def fail():
+            raise RuntimeError('Обработчик упал')
+
+        def create():
+            transaction.on_commit(fail)
+            return Note.objects.create(
+                title='Заметка', text='Текст', slug='note', author=self.author
+            )
+
+        with self.assertLogs('notes.writer', 'ERROR'):
+            note = submit(create)
+        self.assertTrue(Note.objects.filter(pk=note.pk).exists())
+
+
+class TestPasswordViews(TransactionTestCase):
+    """Регистрация и вход с хешированием паролей в пуле потоков."""
+
+    def test_signup_then_login(self):
+        """Зарегистрированный пользователь может войти и видит заметки."""
+        response = self.client.post(
+            reverse('users:signup'),
+            {
+                'username': 'newcomer',
+                'password1': 'Sup3r-secret',
+                'password2': 'Sup3r-secret',
+            }
+        )
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        self.assertTrue(
+            User.objects.get(username='newcomer').check_password(
+                'Sup3r-secret'
+            )
+        )
+
+        response = self.client.post(
+            reverse('users:login'),
+            {'username': 'newcomer', 'password': 'wrong'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        response = self.client.post(
+            reverse('users:login'),
+            {'username': 'newcomer', 'password': 'Sup3r-secret'}
+        )
+        self.assertRedirects(response, reverse('notes:home'))
+        self.assertEqual(
+            self.client.get(reverse('notes:list')).status_code, 200
+        )
@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.test import TestCase, Client
 from django.urls import reverse
 
+from notes.factories import logged_in_client, make_users
 from notes.models import Note
 
 User = get_user_model()
@@ -13,14 +14,7 @@ class TestRoutes(TestCase):
     @classmethod
     def setUpTestData(cls):
         """Создаем тестовые данные."""
-        cls.author = User.objects.create_user(
-            username='author',
-            password='password123'
-        )
-        cls.reader = User.objects.create_user(
-            username='reader',
-            password='password123'
-        )
+        cls.author, cls.reader = make_users('author', 'reader')
         cls.note = Note.objects.create(
             title='Тестовая заметка',
             text='Текст тестовой заметки',
@@ -28,10 +22,8 @@ class TestRoutes(TestCase):
             author=cls.author
         )
         cls.client = Client()
-        cls.author_client = Client()
-        cls.author_client.force_login(cls.author)
-        cls.reader_client = Client()
-        cls.reader_client.force_login(cls.reader)
+        cls.author_client = logged_in_client(cls.author)
+        cls.reader_client = logged_in_client(cls.reader)
 
     def test_home_page_available_to_anonymous(self):
         """Главная страница доступна анонимному пользователю."""
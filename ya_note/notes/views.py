@@ -1,11 +1,30 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponseRedirect
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
+from . import conditional, writer
+from .caching import single_flight_cache
 from .forms import NoteForm
 from .models import Note
 
 
+def browser_variant(request):
+    """
+    Страницы заметок личные: своя запись на пользователя и браузер.
+
+    В шапке есть форма выхода с CSRF-токеном, поэтому копию страницы
+    можно отдавать только браузеру с тем же CSRF-cookie.
+    """
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    if csrf_cookie is None:
+        return None
+    return f'{request.user.pk}:{csrf_cookie}'
+
+
 class Home(generic.TemplateView):
     """Домашняя страница."""
     template_name = 'notes/home.html'
@@ -32,10 +51,9 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
-        return super().form_valid(form)
+        form.instance.author = self.request.user
+        self.object = writer.submit(form.save)
+        return HttpResponseRedirect(self.get_success_url())
 
 
 class NoteUpdate(NoteBase, generic.UpdateView):
@@ -43,17 +61,47 @@ class NoteUpdate(NoteBase, generic.UpdateView):
     template_name = 'notes/form.html'
     form_class = NoteForm
 
+    def form_valid(self, form):
+        self.object = writer.submit(form.save)
+        return HttpResponseRedirect(self.get_success_url())
+
 
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
 
-
+    def form_valid(self, form):
+        success_url = self.get_success_url()
+        writer.submit(self.object.delete)
+        return HttpResponseRedirect(success_url)
+
+
+@method_decorator(
+    (
+        condition(etag_func=conditional.notes_list_etag),
+        single_flight_cache(browser_variant, conditional.notes_list_etag),
+    ),
+    name='get'
+)
 class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
 
+@method_decorator(
+    (
+        condition(
+            etag_func=conditional.note_detail_etag,
+            last_modified_func=conditional.note_detail_last_modified,
+        ),
+        single_flight_cache(
+            browser_variant,
+            conditional.note_detail_etag,
+            conditional.note_detail_last_modified,
+        ),
+    ),
+    name='get'
+)
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
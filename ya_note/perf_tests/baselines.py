@@ -0,0 +1,105 @@
+"""
+Микробенчмарки с базовыми значениями для каждой машины.
+
+Запуск: pytest perf_tests (в обычный прогон тестов не входят).
+
+Каждый замер — лучшее время вызова из нескольких серий timeit,
+делённое на время эталонной нагрузки в чередующихся сериях: так общее
+замедление машины (частота процессора, соседи по хосту) не считается
+регрессией. Базовые значения хранятся в JSON-файле PERF_BASELINE_FILE
+(по умолчанию .perf_baselines.json в корне проекта, в git не попадает)
+отдельно для каждой машины. Первый замер на машине записывается как
+базовый. Замер медленнее базового больше чем на долю PERF_TOLERANCE
+(по умолчанию 0.3) проваливает тест. PERF_UPDATE_BASELINE=1
+перезаписывает базовые значения текущими замерами.
+"""
+import json
+import os
+import platform
+import sys
+import timeit
+from pathlib import Path
+
+from django.conf import settings
+
+ROUNDS = 7
+DEFAULT_TOLERANCE = 0.3
+
+
+def machine_key():
+    """Машина и интерпретатор, для которых верны базовые значения."""
+    return '{}/{}/{}/py{}.{}'.format(
+        platform.node(), platform.machine(), platform.processor(),
+        *sys.version_info[:2],
+    )
+
+
+def measure(func):
+    """
+    Время вызова func в единицах эталонной нагрузки.
+
+    Серии func и эталона чередуются, чтобы изменение скорости машины
+    за время замера сказывалось на обоих одинаково.
+    """
+    timers = [timeit.Timer(func), timeit.Timer(reference)]
+    numbers = [timer.autorange()[0] for timer in timers]
+    best = [float('inf'), float('inf')]
+    for _ in range(ROUNDS):
+        for i, (timer, number) in enumerate(zip(timers, numbers)):
+            best[i] = min(best[i], timer.timeit(number) / number)
+    return best[0] / best[1]
+
+
+def reference():
+    """Эталонная нагрузка на интерпретатор."""
+    return sorted({str(i): i for i in range(1000)}.items(), reverse=True)
+
+
+class Baselines:
+    """Базовые значения замеров текущей машины."""
+
+    def __init__(self, path, tolerance, update):
+        self.path = Path(path)
+        self.tolerance = tolerance
+        self.update = update
+        self.data = (
+            json.loads(self.path.read_text()) if self.path.exists() else {}
+        )
+        self.machine = self.data.setdefault(machine_key(), {})
+        self.changed = False
+
+    def check(self, name, func):
+        """
+        Замеряет func и сравнивает с базовым значением name.
+
+        Возвращает время вызова в единицах эталонной нагрузки.
+        """
+        relative = measure(func)
+        baseline = self.machine.get(name)
+        if baseline is None or self.update:
+            self.machine[name] = relative
+            self.changed = True
+            return relative
+        assert relative <= baseline * (1 + self.tolerance), (
+            f'{name}: {relative:.2f} эталона, базовое значение '
+            f'{baseline:.2f}, допуск {self.tolerance:.0%}'
+        )
+        return relative
+
+    def save(self):
+        if self.changed:
+            self.path.write_text(
+                json.dumps(self.data, indent=2, sort_keys=True) + '\n'
+            )
+
+
+def from_environment():
+    """Базовые значения с путём и допуском из переменных окружения."""
+    return Baselines(
+        os.environ.get(
+            'PERF_BASELINE_FILE',
+            Path(settings.BASE_DIR) / '.perf_baselines.json',
+        ),
+        float(os.environ.get('PERF_TOLERANCE', DEFAULT_TOLERANCE)),
+        os.environ.get('PERF_UPDATE_BASELINE') == '1',
+    )
@@ -0,0 +1,32 @@
+"""
+Фикстуры микробенчмарков notes.
+
+Замеры и базовые значения — в baselines.py.
+"""
+import pytest
+
+from baselines import from_environment
+from notes.factories import logged_in_client, make_notes, make_user
+
+
+@pytest.fixture(scope='session')
+def baselines():
+    baselines = from_environment()
+    yield baselines
+    baselines.save()
+
+
+@pytest.fixture
+def author():
+    return make_user('author')
+
+
+@pytest.fixture
+def author_client(author):
+    return logged_in_client(author)
+
+
+@pytest.fixture
+def seeded_notes(author):
+    """Список заметок автора."""
+    return make_notes(author, 50)
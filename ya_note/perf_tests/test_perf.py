@@ -0,0 +1,37 @@
+from itertools import count
+
+import pytest
+from django.urls import reverse
+
+from notes.forms import NoteForm
+from notes.models import Note
+
+pytestmark = pytest.mark.django_db
+
+
+class TestPerformance:
+    """Время критичных путей не хуже базового."""
+
+    def test_note_form_clean_slug(self, baselines, seeded_notes):
+        form = NoteForm()
+        form.cleaned_data = {'title': 'Новая заметка о важном', 'slug': ''}
+        assert form.clean_slug() == 'novaya-zametka-o-vazhnom'
+        baselines.check('NoteForm.clean_slug', form.clean_slug)
+
+    def test_note_save_generates_slug(self, baselines, author):
+        numbers = count()
+
+        def save():
+            Note(
+                title=f'Заметка о важном {next(numbers)}',
+                text='Текст',
+                author=author,
+            ).save()
+
+        baselines.check('Note.save', save)
+        assert Note.objects.filter(slug='zametka-o-vazhnom-0').exists()
+
+    def test_notes_list_render(self, baselines, seeded_notes, author_client):
+        url = reverse('notes:list')
+        assert author_client.get(url).status_code == 200
+        baselines.check('NotesList', lambda: author_client.get(url))
@@ -2,6 +2,9 @@
 ASGI config for yanote project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Collected static files are served by ``yanote.static`` in front of Django.
+With WARMUP_ON_START the process is warmed up by ``yanote.warmup`` before
+serving requests.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -13,4 +16,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from yanote import warmup  # noqa: E402
+from yanote.static import asgi_static_files  # noqa: E402
+
+application = asgi_static_files(django_application)
+
+if settings.WARMUP_ON_START:
+    warmup.run_in_thread()
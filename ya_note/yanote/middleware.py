@@ -0,0 +1,227 @@
+"""
+Промежуточные слои защиты от перегрузки.
+
+Решения записываются в журнал yanote.middleware: сброс запроса —
+с уровнем WARNING, изменение лимита — с уровнем INFO.
+"""
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from notes.writer import WriteQueueBusy
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Во сколько раз уменьшается лимит, если запрос выполнялся дольше цели.
+BACKOFF = 0.9
+# Сколько секунд держится блокировка корзины токенов в кеше и сколько
+# ждать её освобождения, прежде чем отказать запросу.
+BUCKET_LOCK_TIMEOUT = 1
+BUCKET_LOCK_WAIT = 0.5
+
+
+def overloaded():
+    """Ответ 503 с Retry-After."""
+    response = HttpResponse(
+        'Сервер перегружен, повторите запрос позже.', status=503
+    )
+    response['Retry-After'] = settings.CONCURRENCY_RETRY_AFTER
+    return response
+
+
+class AdaptiveLimit:
+    """
+    Лимит одновременных запросов, подстраиваемый по задержке (AIMD).
+
+    Пока запросы укладываются в target_latency, лимит растёт примерно
+    на единицу за каждые limit запросов; при превышении — уменьшается
+    в BACKOFF раз, но не ниже minimum.
+    """
+
+    def __init__(self, name, initial, minimum, maximum, target_latency):
+        self.name = name
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                self.shed += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency):
+        with self._lock:
+            self.in_flight -= 1
+            previous = int(self.limit)
+            if latency > self.target_latency:
+                self.limit = max(self.minimum, self.limit * BACKOFF)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            current = int(self.limit)
+        if current != previous:
+            logger.info(
+                'Лимит %s: %d -> %d (задержка %.3f с)',
+                self.name, previous, current, latency
+            )
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Ограничивает число одновременных запросов в процессе.
+
+    Чтение и запись (небезопасные методы: комментарии, заметки) имеют
+    отдельные лимиты из CONCURRENCY_LIMITS. Сверх лимита запрос сразу
+    получает 503 с Retry-After, не доходя до сессий и БД. Так же
+    отвечает запрос, чью запись не приняла очередь (WriteQueueBusy).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limits = {
+            name: AdaptiveLimit(name, **options)
+            for name, options in settings.CONCURRENCY_LIMITS.items()
+        }
+
+    def __call__(self, request):
+        route_class = 'read' if request.method in SAFE_METHODS else 'write'
+        limit = self.limits[route_class]
+        if not limit.try_acquire():
+            logger.warning(
+                'Запрос %s %s отклонён: %s занят (%d из %d)',
+                request.method, request.path, route_class,
+                limit.in_flight, int(limit.limit)
+            )
+            return overloaded()
+        started = time.monotonic()
+        try:
+            return self.get_response(request)
+        finally:
+            limit.release(time.monotonic() - started)
+
+    def process_exception(self, request, exception):
+        """Очередь записи не успела принять изменение — тоже перегрузка."""
+        if isinstance(exception, WriteQueueBusy):
+            logger.warning(
+                'Запрос %s %s отклонён: %s',
+                request.method, request.path, exception
+            )
+            return overloaded()
+        return None
+
+
+class TokenBucket:
+    """
+    Корзина токенов в общем кеше.
+
+    Вмещает не больше burst токенов и пополняется на per_minute токенов
+    в минуту; каждый запрос забирает один токен. Состояние — пара
+    (токены, время обновления); чтение и запись выполняются под
+    блокировкой cache.add, поэтому атомарны и между процессами, если
+    кеш общий. Если блокировку не удалось взять за BUCKET_LOCK_WAIT,
+    запрос ограничивается, как при пустой корзине: иначе поток
+    одновременных запросов обходил бы лимит.
+    """
+
+    def __init__(self, key, burst, per_minute):
+        self.key = key
+        self.burst = burst
+        self.rate = per_minute / 60
+
+    def _lock(self):
+        deadline = time.monotonic() + BUCKET_LOCK_WAIT
+        while not cache.add(self.key + '.lock', 1, BUCKET_LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def take(self):
+        """Забирает токен; возвращает, через сколько секунд он появится."""
+        if not self._lock():
+            logger.info('Корзина %s занята, запрос ограничен', self.key)
+            return BUCKET_LOCK_TIMEOUT
+        try:
+            now = time.time()
+            tokens, updated = cache.get(self.key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                return (1 - tokens) / self.rate
+            cache.set(
+                self.key, (tokens - 1, now),
+                timeout=int(self.burst / self.rate) + 1
+            )
+            return 0
+        finally:
+            cache.delete(self.key + '.lock')
+
+
+class RateLimitMiddleware:
+    """
+    Ограничивает частоту записи для отдельных маршрутов.
+
+    RATE_LIMITS задаёт для имени маршрута корзины токенов по пользователю
+    и по IP-адресу. Корзина вошедшего пользователя привязана к его id:
+    повторный вход или новая cookie не дают свежую корзину; анонимный
+    клиент различается по cookie сессии. Проверка идёт в process_view,
+    до валидации формы. Если хотя бы одна корзина пуста — ответ 429
+    с Retry-After.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS:
+            return None
+        limits = settings.RATE_LIMITS.get(request.resolver_match.view_name)
+        if not limits:
+            return None
+        user = request.user
+        clients = {
+            'user': (
+                f'user:{user.pk}' if user.is_authenticated
+                else request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+            ),
+            'ip': request.META.get('REMOTE_ADDR'),
+        }
+        wait = 0
+        for scope, client in clients.items():
+            if client is None or scope not in limits:
+                continue
+            # Cookie приходит от клиента: в ключ идёт только хеш.
+            digest = hashlib.md5(
+                client.encode(), usedforsecurity=False
+            ).hexdigest()
+            bucket = TokenBucket(
+                f'ratelimit.{request.resolver_match.view_name}.'
+                f'{scope}.{digest}',
+                **limits[scope]
+            )
+            wait = max(wait, bucket.take())
+        if not wait:
+            return None
+        logger.warning(
+            'Запрос %s %s отклонён: превышена частота записи',
+            request.method, request.path
+        )
+        response = HttpResponse(
+            'Слишком много запросов, повторите позже.', status=429
+        )
+        response['Retry-After'] = int(wait) + 1
+        return response
@@ -1,3 +1,4 @@
+import tempfile
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,6 +23,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.compression.CompressionMiddleware',
+    'yanote.middleware.ConcurrencyLimitMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -29,6 +32,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yanote.middleware.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'yanote.urls'
@@ -60,6 +64,15 @@ DATABASES = {
 }
 
 
+# Кеш должен быть общим для всех процессов. LocMemCache подходит
+# для одного процесса, для нескольких — FileBasedCache или Redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
@@ -82,8 +95,88 @@ USE_TZ = True
 
 
 STATIC_URL = '/static/'
+STATICFILES_DIRS = [BASE_DIR / 'static_dev']
+# Сюда collectstatic собирает файлы с хешами в именах и их сжатые копии;
+# их отдаёт yanote.static.
+STATIC_ROOT = BASE_DIR / 'static'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'yanote.static.CompressedManifestStaticFilesStorage',
+    },
+}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# Кеш страниц с защитой от лавины промахов (notes.caching): время жизни
+# записи, сколько ещё можно отдавать устаревшую копию, пока страницу
+# пересчитывает другой обработчик, и сколько ждать, если копии нет.
+# 0 в PAGE_CACHE_TIMEOUT выключает кеш.
+PAGE_CACHE_TIMEOUT = 0
+PAGE_CACHE_STALE_TIMEOUT = 0
+PAGE_CACHE_WAIT = 2.0
+PAGE_CACHE_LOCK_DIR = Path(tempfile.gettempdir()) / 'yanote-page-locks'
+
+# Адаптивные лимиты одновременных запросов на процесс: отдельно для
+# чтения и для записи. Сверх лимита — ответ 503 с Retry-After (секунд).
+CONCURRENCY_LIMITS = {
+    'read': {
+        'initial': 20, 'minimum': 4, 'maximum': 100, 'target_latency': 0.5,
+    },
+    'write': {
+        'initial': 4, 'minimum': 1, 'maximum': 16, 'target_latency': 0.5,
+    },
+}
+CONCURRENCY_RETRY_AFTER = 1
+
+# Частота записи по именам маршрутов: корзины токенов на сессию и на
+# IP-адрес (burst — запас запросов подряд, per_minute — пополнение).
+# Состояние хранится в кеше default, поэтому для нескольких процессов
+# он должен быть общим. За прокси REMOTE_ADDR нужно восстанавливать
+# из заголовка, иначе все клиенты попадут в одну корзину по IP.
+RATE_LIMITS = {
+    'notes:add': {
+        'user': {'burst': 5, 'per_minute': 10},
+        'ip': {'burst': 30, 'per_minute': 60},
+    },
+    'notes:edit': {
+        'user': {'burst': 5, 'per_minute': 10},
+        'ip': {'burst': 30, 'per_minute': 60},
+    },
+}
+
+# Очередь записи (notes.writer): изменения выполняет один поток процесса
+# с групповой фиксацией до WRITE_QUEUE_BATCH заданий. Запрос ждёт начала
+# своего задания не дольше WRITE_QUEUE_TIMEOUT секунд, иначе — 503.
+WRITE_QUEUE_ENABLED = False
+WRITE_QUEUE_SIZE = 1000
+WRITE_QUEUE_BATCH = 100
+WRITE_QUEUE_TIMEOUT = 5
+
+# Сжатие ответов (notes.compression): ответы меньше COMPRESSION_MIN_SIZE
+# байт не сжимаются — выигрыш меньше затрат.
+COMPRESSION_MIN_SIZE = 1024
+
+# Сессии и пользователи сессий читаются из кеша, БД — при промахе.
+# Сессии пишутся и в кеш, и в БД. С LocMemCache у каждого процесса свой
+# кеш, и изменение пользователя другие процессы увидят только через
+# AUTH_USER_CACHE_TIMEOUT секунд; в продакшене нужен общий кеш (Redis).
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = ['notes.backends.CachedModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Пароли при входе и регистрации хешируются в пуле потоков
+# (yanote.views). Сверх PASSWORD_HASHING_QUEUE ожидающих заданий вход
+# и регистрация получают 503, не занимая обработчики запросов.
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_QUEUE = 8
+
+# Прогрев процесса (yanote.warmup) при загрузке yanote.wsgi и yanote.asgi:
+# маршруты, шаблоны, переводы, соединения с БД и запросы к WARMUP_URLS.
+WARMUP_ON_START = False
+WARMUP_URLS = [reverse_lazy('notes:home')]
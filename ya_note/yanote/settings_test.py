@@ -0,0 +1,16 @@
+"""
+Настройки для тестов: быстрый хешер паролей.
+
+Используются pytest (см. pytest.ini) и python manage.py test
+--settings=yanote.settings_test.
+"""
+from django.conf import global_settings
+
+from .settings import *  # noqa: F401, F403
+
+# PBKDF2 намеренно медленный; в тестах пароли не нужно защищать.
+# Остальные хешеры нужны, чтобы проверять уже сохранённые хеши.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+    *global_settings.PASSWORD_HASHERS,
+]
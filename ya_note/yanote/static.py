@@ -0,0 +1,187 @@
+"""
+Статика с хешированными именами и заранее сжатыми вариантами.
+
+CompressedManifestStaticFilesStorage при collectstatic рядом с каждым
+текстовым файлом кладёт .gz и, если установлен пакет brotli, .br.
+wsgi_static_files и asgi_static_files оборачивают приложения WSGI
+и ASGI и отдают файлы из STATIC_ROOT сами, выбирая вариант
+по Accept-Encoding. Файлы с хешем в имени кешируются навсегда.
+"""
+import gzip
+import mimetypes
+import re
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.json', '.map', '.html')
+# Сжимать файлы меньше этого размера нет смысла: выигрыш меньше пакета.
+MIN_COMPRESS_SIZE = 1024
+# Варианты в порядке предпочтения: (кодировка, расширение файла).
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+
+
+def _compress(path):
+    data = path.read_bytes()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            path.with_name(path.name + suffix).write_bytes(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Хранилище с хешами в именах и сжатыми копиями файлов.
+
+    Пока collectstatic не выполнялся (в тестах и при разработке),
+    ссылки ведут на исходные имена файлов.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if name.endswith(COMPRESSIBLE):
+                _compress(Path(self.path(name)))
+
+
+def find_file(path, accept_encoding):
+    """
+    Файл статики для пути запроса и кодировка выбранного варианта.
+
+    Возвращает (None, None), если путь не ведёт к файлу в STATIC_ROOT.
+    """
+    root = Path(settings.STATIC_ROOT).resolve()
+    try:
+        source = (root / path[len(settings.STATIC_URL):]).resolve()
+        if root not in source.parents or not source.is_file():
+            return None, None
+    except (ValueError, OSError):
+        # Нулевой байт или слишком длинное имя в пути запроса.
+        return None, None
+    accepted = {
+        value.split(';')[0].strip() for value in accept_encoding.split(',')
+    }
+    for encoding, suffix in ENCODINGS:
+        variant = source.with_name(source.name + suffix)
+        if encoding in accepted and variant.is_file():
+            return variant, encoding
+    return source, None
+
+
+def static_response(path, headers):
+    """
+    Статус, заголовки и файл ответа (или None для ответа без тела).
+
+    headers — заголовки запроса с именами в нижнем регистре. Возвращает
+    None, если запрос не к статике.
+    """
+    if not settings.STATIC_ROOT or not path.startswith(settings.STATIC_URL):
+        return None
+    file, encoding = find_file(path, headers.get('accept-encoding', ''))
+    if file is None:
+        return None
+    name = path.rsplit('/', 1)[-1]
+    stat = file.stat()
+    content_type = (
+        mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    )
+    if content_type.startswith('text/') or content_type.endswith(
+        ('javascript', 'json', 'svg+xml')
+    ):
+        content_type += '; charset=utf-8'
+    response_headers = [
+        ('Content-Type', content_type),
+        ('Last-Modified', http_date(stat.st_mtime)),
+        ('Vary', 'Accept-Encoding'),
+        (
+            'Cache-Control',
+            IMMUTABLE if HASHED_NAME.search(name) else REVALIDATE
+        ),
+    ]
+    if encoding:
+        response_headers.append(('Content-Encoding', encoding))
+    since = parse_http_date_safe(headers.get('if-modified-since', ''))
+    if since is not None and int(stat.st_mtime) <= since:
+        return 304, response_headers, None
+    response_headers.append(('Content-Length', str(stat.st_size)))
+    return 200, response_headers, file
+
+
+def wsgi_static_files(application):
+    """Отдаёт запросы к STATIC_URL из STATIC_ROOT в обход Django (WSGI)."""
+    def wsgi(environ, start_response):
+        if environ['REQUEST_METHOD'] in ('GET', 'HEAD'):
+            headers = {
+                'accept-encoding': environ.get('HTTP_ACCEPT_ENCODING', ''),
+                'if-modified-since': environ.get(
+                    'HTTP_IF_MODIFIED_SINCE', ''
+                ),
+            }
+            result = static_response(environ['PATH_INFO'], headers)
+            if result is not None:
+                status, response_headers, file = result
+                start_response(
+                    '200 OK' if status == 200 else '304 Not Modified',
+                    response_headers
+                )
+                if file is None or environ['REQUEST_METHOD'] == 'HEAD':
+                    return [b'']
+                file_wrapper = environ.get('wsgi.file_wrapper')
+                if file_wrapper is not None:
+                    return file_wrapper(file.open('rb'))
+                return [file.read_bytes()]
+        return application(environ, start_response)
+    return wsgi
+
+
+def asgi_static_files(application):
+    """Отдаёт запросы к STATIC_URL из STATIC_ROOT в обход Django (ASGI)."""
+    async def router(scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            headers = {
+                key.decode('latin-1'): value.decode('latin-1')
+                for key, value in scope['headers']
+            }
+            result = static_response(scope['path'], headers)
+            if result is not None:
+                status, response_headers, file = result
+                await send({
+                    'type': 'http.response.start',
+                    'status': status,
+                    'headers': [
+                        (key.lower().encode(), value.encode())
+                        for key, value in response_headers
+                    ],
+                })
+                body = b''
+                if file is not None and scope['method'] == 'GET':
+                    body = await sync_to_async(
+                        file.read_bytes, thread_sensitive=False
+                    )()
+                await send({'type': 'http.response.body', 'body': body})
+                return
+        return await application(scope, receive, send)
+    return router
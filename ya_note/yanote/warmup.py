@@ -0,0 +1,154 @@
+"""
+Прогрев процесса перед первыми запросами.
+
+Django многое строит при первом использовании: маршруты, скомпилированные
+шаблоны (кешируются загрузчиком django.template.loaders.cached, который
+с Django 4.1 включён и при DEBUG), каталоги переводов LANGUAGE_CODE,
+соединения с БД. run() делает всё это заранее и запрашивает страницы
+WARMUP_URLS, чтобы заполнить кеши и импортировать всё, что нужно
+представлениям.
+
+Вызывается из yanote.wsgi и yanote.asgi, если WARMUP_ON_START включён,
+и из gunicorn.conf.py при preload_app. При preload прогрев идёт в главном
+процессе до fork: соединения с БД после него закрываются, а открывает их
+каждый рабочий процесс.
+"""
+import logging
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.test import Client
+from django.urls import URLPattern, get_resolver, reverse
+from django.utils import formats, timezone, translation
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+
+def _patterns(resolver, namespace=''):
+    """Имена маршрутов без параметров."""
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLPattern):
+            if pattern.name and not pattern.pattern.regex.groups:
+                yield namespace + pattern.name
+        else:
+            prefix = (
+                f'{pattern.namespace}:' if pattern.namespace else ''
+            )
+            yield from _patterns(pattern, namespace + prefix)
+
+
+def resolve_urls():
+    """Строит таблицы маршрутов и разрешает маршруты без параметров."""
+    resolver = get_resolver()
+    # Обращение к таблицам строит их для всех вложенных urlconf.
+    resolver.reverse_dict
+    resolver.namespace_dict
+    count = 0
+    for name in _patterns(resolver):
+        resolver.resolve(reverse(name))
+        count += 1
+    return count
+
+
+def compile_templates():
+    """Компилирует все шаблоны в кеш загрузчика."""
+    count = 0
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            directory = Path(directory)
+            for path in sorted(directory.rglob('*')):
+                if path.suffix not in TEMPLATE_SUFFIXES:
+                    continue
+                name = path.relative_to(directory).as_posix()
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError as error:
+                    # Шаблон-фрагмент может не компилироваться сам по себе.
+                    logger.debug('Шаблон %s пропущен: %s', name, error)
+                else:
+                    count += 1
+    return count
+
+
+def load_translations():
+    """Загружает каталоги переводов и форматы LANGUAGE_CODE."""
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('Log in')
+        formats.date_format(timezone.now(), 'DATETIME_FORMAT')
+    return 1
+
+
+def open_connections():
+    """Открывает соединения со всеми БД."""
+    for connection in connections.all():
+        connection.ensure_connection()
+    return len(connections.all())
+
+
+def close_connections():
+    connections.close_all()
+
+
+def prime_caches():
+    """Проверяет кеши и запрашивает страницы WARMUP_URLS."""
+    for alias in settings.CACHES:
+        caches[alias].get('warmup')
+    host = next(
+        (host for host in settings.ALLOWED_HOSTS if '*' not in host),
+        'localhost',
+    ).lstrip('.')
+    client = Client(HTTP_HOST=host)
+    for url in settings.WARMUP_URLS:
+        response = client.get(url)
+        if response.status_code >= 400:
+            logger.warning(
+                'Прогрев: %s ответил %s', url, response.status_code
+            )
+    return len(settings.WARMUP_URLS)
+
+
+STEPS = (
+    ('маршруты', resolve_urls),
+    ('шаблоны', compile_templates),
+    ('переводы', load_translations),
+    ('соединения', open_connections),
+    ('кеши и страницы', prime_caches),
+)
+
+
+def run():
+    """Прогревает процесс; возвращает [(этап, число объектов, секунды)]."""
+    timings = []
+    for title, step in STEPS:
+        started = time.perf_counter()
+        count = step()
+        timings.append((title, count, time.perf_counter() - started))
+    logger.info(
+        'Прогрев: %s',
+        ', '.join(
+            f'{title} {count} за {seconds * 1000:.0f} мс'
+            for title, count, seconds in timings
+        )
+    )
+    return timings
+
+
+def run_in_thread():
+    """
+    run() в отдельном потоке с ожиданием конца.
+
+    ASGI-сервер может импортировать приложение внутри цикла событий,
+    где Django запрещает синхронные запросы к БД. Соединения потока
+    прогрева запросам не достаются, но маршруты, шаблоны и переводы
+    общие для процесса.
+    """
+    thread = threading.Thread(target=run, name='warmup')
+    thread.start()
+    thread.join()
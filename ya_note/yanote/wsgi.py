@@ -2,6 +2,9 @@
 WSGI config for yanote project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+Collected static files are served by ``yanote.static`` in front of Django.
+With WARMUP_ON_START the process is warmed up by ``yanote.warmup`` before
+serving requests.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
@@ -13,4 +16,14 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
 
-application = get_wsgi_application()
+django_application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from yanote import warmup  # noqa: E402
+from yanote.static import wsgi_static_files  # noqa: E402
+
+application = wsgi_static_files(django_application)
+
+if settings.WARMUP_ON_START:
+    warmup.run()